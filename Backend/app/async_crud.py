@@ -0,0 +1,82 @@
+"""
+Async counterparts of the hot read paths in crud.py, for the async route handlers.
+Lazy loading is not available under asyncio, so every relationship the response
+schemas touch is eager-loaded here.
+"""
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from models import Product, Category, Order, OrderItem, Cart, CartItem
+from crud import PRODUCT_SORTS, _apply_keyset, _keyset_page, cart_lines_query, cart_summary
+
+# Product loader options shared by listings, carts and orders
+_PRODUCT_OPTIONS = (joinedload(Product.category_rel), selectinload(Product.reviews))
+
+# Product reads
+async def get_products(db: AsyncSession, skip: int = 0, limit: int = 100):
+    result = await db.execute(
+        select(Product).options(*_PRODUCT_OPTIONS).order_by(Product.id).offset(skip).limit(limit)
+    )
+    return result.scalars().all()
+
+def _product_versions_select():
+    return select(
+        Product.id,
+        Product.created_at,
+        Product.updated_at,
+        Category.updated_at.label("category_updated_at"),
+    ).outerjoin(Category, Product.category_id == Category.id)
+
+async def get_product_version(db: AsyncSession, product_id: int):
+    result = await db.execute(_product_versions_select().filter(Product.id == product_id))
+    return result.first()
+
+async def get_products_versions(db: AsyncSession, skip: int = 0, limit: int = 100):
+    result = await db.execute(_product_versions_select().order_by(Product.id).offset(skip).limit(limit))
+    return result.all()
+
+async def get_products_page_versions(db: AsyncSession, limit: int = 100, sort: str = "newest", cursor: str | None = None):
+    result = await db.execute(_apply_keyset(_product_versions_select(), sort, limit, cursor))
+    return result.all()
+
+async def get_products_page(db: AsyncSession, limit: int = 100, sort: str = "newest", cursor: str | None = None):
+    """Async get_products_page: returns (products, next_cursor)."""
+    q = _apply_keyset(select(Product).options(*_PRODUCT_OPTIONS), sort, limit, cursor, sorts=PRODUCT_SORTS)
+    result = await db.execute(q)
+    return _keyset_page(list(result.scalars().all()), sort, limit)
+
+async def get_product(db: AsyncSession, product_id: int):
+    result = await db.execute(select(Product).options(*_PRODUCT_OPTIONS).filter(Product.id == product_id))
+    return result.scalars().first()
+
+# Cart reads
+async def get_cart(db: AsyncSession, user_id: int) -> Cart:
+    q = select(Cart).options(
+        selectinload(Cart.cart_items).joinedload(CartItem.product).options(*_PRODUCT_OPTIONS)
+    ).filter(Cart.user_id == user_id)
+    cart = (await db.execute(q)).scalars().first()
+    if cart is None:
+        db.add(Cart(user_id=user_id))
+        await db.commit()
+        cart = (await db.execute(q)).scalars().first()
+    return cart
+
+async def get_cart_summary(db: AsyncSession, user_id: int) -> dict:
+    return cart_summary((await db.execute(cart_lines_query(user_id))).all())
+
+# Order reads
+def _order_select():
+    return select(Order).options(
+        joinedload(Order.user),
+        selectinload(Order.order_items).joinedload(OrderItem.product).options(*_PRODUCT_OPTIONS),
+    )
+
+async def get_orders_by_user(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100):
+    result = await db.execute(
+        _order_select().filter(Order.user_id == user_id).order_by(Order.created_at.desc()).offset(skip).limit(limit)
+    )
+    return result.scalars().all()
+
+async def get_order(db: AsyncSession, order_id: int):
+    result = await db.execute(_order_select().filter(Order.id == order_id))
+    return result.scalars().first()
@@ -0,0 +1,143 @@
+import gzip
+import os
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from cache import TTLCache
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+# Compressed bodies of responses that carry an ETag, keyed by URL, ETag and encoding.
+# A new representation gets a new ETag, so entries never need explicit invalidation.
+compressed_cache = TTLCache(
+    max_entries=int(os.getenv("COMPRESSION_CACHE_MAX_ENTRIES", "512")),
+    ttl_seconds=float(os.getenv("CATALOG_CACHE_TTL_SECONDS", "300")),
+)
+
+
+def supported_encodings() -> tuple[str, ...]:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """Pick the preferred supported encoding from an Accept-Encoding header (q=0 excludes)."""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for encoding in supported_encodings():  # server preference breaks ties
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """
+    gzip/brotli for complete (non-streaming) responses above `minimum_size`.
+    Compression runs in a worker thread so large bodies don't stall the event loop,
+    and responses with an ETag (the cached catalog reads) are compressed once per representation.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        start_message: Message | None = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            headers = MutableHeaders(scope=start_message)
+            if start_message["status"] == 304:
+                # A 304 carries no content-type, but must repeat the Vary and ETag the 200 would send
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if encoding is not None and etag is not None and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            compressible = (
+                headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+                and "content-encoding" not in headers
+                and start_message["status"] != 204
+            )
+            if compressible:
+                headers.add_vary_header("Accept-Encoding")
+
+            # Streaming bodies (e.g. the catalog export) are passed through as they come
+            if message.get("more_body", False) or not compressible or encoding is None or len(body) < self.minimum_size:
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            etag = headers.get("etag")
+            key = None
+            if etag is not None:
+                query = scope.get("query_string", b"").decode("latin-1")
+                key = ("compressed", scope["path"], query, etag, encoding)
+            compressed = compressed_cache.get(key) if key is not None else None
+            if compressed is None:
+                compressed = await anyio.to_thread.run_sync(compress, body, encoding)
+                if key is not None:
+                    compressed_cache.set(key, compressed)
+
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            if etag is not None and not etag.startswith("W/"):
+                # The encoded bytes differ from the identity representation, so the validator becomes weak
+                headers["ETag"] = f"W/{etag}"
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
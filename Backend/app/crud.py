@@ -1,16 +1,58 @@
 from datetime import datetime
-from sqlalchemy.orm import Session, joinedload
-from models import Product, Category, Review, User, Admin, RefreshToken, Order, OrderItem, Cart, CartItem, PaymentTransaction
+from sqlalchemy import tuple_, func, cast, and_, true, case, select, update, delete, bindparam, column, literal, Float, Integer, Numeric
+from sqlalchemy.dialects.postgresql import ARRAY, array, insert
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from models import PRODUCT_EFFECTIVE_PRICE, Product, ProductRecommendation, Category, Review, User, Admin, RefreshToken, Order, OrderItem, Cart, CartItem, PaymentTransaction
 from schemas import (
     ProductCreate, ProductUpdate, CategoryCreate, CategoryUpdate,
     ReviewCreate, ReviewUpdate, UserCreate, UserUpdate, AdminCreate
-    , OrderCreate, OrderUpdate
+    , OrderCreate, OrderUpdate, ProductFilter
 )
 from auth import get_password_hash
+from pagination import encode_cursor, decode_cursor
+from cache import catalog_cache
+from database import SessionLocal
+from suggest import suggest_index
+
+# Catalog cache invalidation; call after the write has been committed
+def _invalidate_products(*product_ids: int):
+    for product_id in product_ids:
+        catalog_cache.invalidate_prefix(("product", product_id))
+    # Listings embed products (with their category and reviews)
+    catalog_cache.invalidate_namespace("products")
+    catalog_cache.invalidate_namespace("category_stats")
+
+def _invalidate_categories():
+    catalog_cache.invalidate_namespace("categories")
+    catalog_cache.invalidate_namespace("category_stats")
 
 # Category CRUD
 def get_categories(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Category).offset(skip).limit(limit).all()
+    return db.query(Category).order_by(Category.id).offset(skip).limit(limit).all()
+
+def get_categories_versions(db: Session, skip: int = 0, limit: int = 100):
+    """Row versions for the same page as get_categories (used for ETag/Last-Modified)."""
+    return db.query(Category.id, Category.created_at, Category.updated_at).order_by(
+        Category.id
+    ).offset(skip).limit(limit).all()
+
+def get_categories_with_stats(db: Session, skip: int = 0, limit: int = 100):
+    """Categories with product_count, in_stock_count, min_price and max_price, from one grouped query."""
+    return db.query(
+        Category.id,
+        Category.name,
+        Category.description,
+        Category.created_at,
+        Category.updated_at,
+        func.count(Product.id).label("product_count"),
+        func.count(Product.id).filter(Product.stock_quantity > 0).label("in_stock_count"),
+        func.min(Product.price).label("min_price"),
+        func.max(Product.price).label("max_price"),
+    ).outerjoin(Product, Product.category_id == Category.id).group_by(
+        Category.id
+    ).order_by(Category.id).offset(skip).limit(limit).all()
 
 def get_category(db: Session, category_id: int):
     return db.query(Category).filter(Category.id == category_id).first()
@@ -20,6 +62,7 @@ def create_category(db: Session, category: CategoryCreate):
     db.add(db_category)
     db.commit()
     db.refresh(db_category)
+    _invalidate_categories()
     return db_category
 
 def update_category(db: Session, category_id: int, category: CategoryUpdate):
@@ -29,6 +72,11 @@ def update_category(db: Session, category_id: int, category: CategoryUpdate):
             setattr(db_category, key, value)
         db.commit()
         db.refresh(db_category)
+        _invalidate_categories()
+        # Products embed their category
+        product_ids = [pid for (pid,) in db.query(Product.id).filter(Product.category_id == category_id)]
+        _invalidate_products(*product_ids)
+        suggest_index.mark_stale()
     return db_category
 
 def delete_category(db: Session, category_id: int):
@@ -36,6 +84,8 @@ def delete_category(db: Session, category_id: int):
     if db_category:
         db.delete(db_category)
         db.commit()
+        _invalidate_categories()
+        suggest_index.mark_stale()
     return db_category
 
 # Product CRUD
@@ -43,7 +93,344 @@ def get_products(db: Session, skip: int = 0, limit: int = 100):
     return db.query(Product).options(
         joinedload(Product.category_rel),
         joinedload(Product.reviews)
-    ).offset(skip).limit(limit).all()
+    ).order_by(Product.id).offset(skip).limit(limit).all()
+
+# Row versions of products, for ETag/Last-Modified. Review writes bump Product.updated_at,
+# and the embedded category is covered by its own timestamp.
+def _product_versions_query(db: Session):
+    return db.query(
+        Product.id,
+        Product.created_at,
+        Product.updated_at,
+        Category.updated_at.label("category_updated_at"),
+    ).outerjoin(Category, Product.category_id == Category.id)
+
+def get_product_version(db: Session, product_id: int):
+    return _product_versions_query(db).filter(Product.id == product_id).first()
+
+def get_products_versions(db: Session, skip: int = 0, limit: int = 100):
+    return _product_versions_query(db).order_by(Product.id).offset(skip).limit(limit).all()
+
+# Keyset sorts: sort name -> (column, descending, parser for the cursor value).
+# Every sort is tie-broken on Product.id and backed by a composite index in models.py.
+PRODUCT_SORTS = {
+    "newest": (Product.created_at, True, datetime.fromisoformat),
+    "oldest": (Product.created_at, False, datetime.fromisoformat),
+    "price_asc": (Product.price, False, float),
+    "price_desc": (Product.price, True, float),
+    "rating_desc": (Product.rating, True, float),
+}
+
+def _apply_keyset(q, sort: str, limit: int, cursor: str | None, sorts: dict = PRODUCT_SORTS, id_column=Product.id):
+    """Filter, order and limit a query for one keyset page (limit + 1 rows are fetched)."""
+    if sort not in sorts:
+        raise ValueError(f"Unsupported sort: {sort}")
+    if limit <= 0:
+        raise ValueError("Limit must be greater than 0")
+    column, descending, parse = sorts[sort]
+
+    if cursor:
+        values = decode_cursor(cursor, sort)
+        try:
+            last_value, last_id = parse(values[0]), int(values[1])
+        except (IndexError, TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+        key = tuple_(column, id_column)
+        boundary = tuple_(last_value, last_id)
+        q = q.filter(key < boundary if descending else key > boundary)
+
+    if descending:
+        q = q.order_by(column.desc(), id_column.desc())
+    else:
+        q = q.order_by(column.asc(), id_column.asc())
+
+    # Fetch one extra row to know whether another page exists
+    return q.limit(limit + 1)
+
+def _keyset_page(rows: list, sort: str, limit: int, sorts: dict = PRODUCT_SORTS):
+    """Trim the extra row fetched by _apply_keyset and build the cursor for the next page."""
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        column = sorts[sort][0]
+        next_cursor = encode_cursor(sort, [getattr(last, column.key), last.id])
+    return rows, next_cursor
+
+def get_products_page_versions(db: Session, limit: int = 100, sort: str = "newest", cursor: str | None = None):
+    """Row versions for the same keyset page as get_products_page (including the look-ahead row)."""
+    return _apply_keyset(_product_versions_query(db), sort, limit, cursor).all()
+
+def get_products_page(db: Session, limit: int = 100, sort: str = "newest", cursor: str | None = None):
+    """
+    Keyset-paginated product listing.
+    Returns (products, next_cursor); next_cursor is None on the last page.
+    """
+    q = db.query(Product).options(
+        joinedload(Product.category_rel),
+        joinedload(Product.reviews)
+    )
+    products = _apply_keyset(q, sort, limit, cursor).all()
+    return _keyset_page(products, sort, limit)
+
+# Columns available to the slim product projection (schemas.ProductSummary).
+PRODUCT_SUMMARY_COLUMNS = {
+    "id": Product.id,
+    "name": Product.name,
+    "price": Product.price,
+    "discount_percentage": Product.discount_percentage,
+    "rating": Product.rating,
+    "review_count": Product.review_count,
+    "thumbnail": Product.thumbnail,
+    "availability_status": Product.availability_status,
+    "in_stock": (Product.stock_quantity > 0).label("in_stock"),
+    "category_name": Category.name.label("category_name"),
+    "category_id": Product.category_id,
+    "brand": Product.brand,
+    "description": Product.description,
+    "sku": Product.sku,
+    "stock_quantity": Product.stock_quantity,
+    "created_at": Product.created_at,
+}
+
+DEFAULT_SUMMARY_FIELDS = (
+    "id", "name", "price", "discount_percentage", "rating",
+    "thumbnail", "availability_status", "in_stock", "category_name",
+)
+
+def parse_summary_fields(fields: str | None) -> list[str]:
+    """Parse a comma-separated `fields=` value. `id` is always included."""
+    if not fields:
+        return list(DEFAULT_SUMMARY_FIELDS)
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in PRODUCT_SUMMARY_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return ["id"] + [f for f in dict.fromkeys(requested) if f != "id"]
+
+def _summary_query(db: Session, fields: list[str], extra_columns=()):
+    """Select only the requested columns; categories are joined only when category_name is asked for."""
+    columns = [PRODUCT_SUMMARY_COLUMNS[f] for f in fields]
+    columns += [c for c in extra_columns if c.key not in fields]
+    q = db.query(*columns).select_from(Product)
+    if "category_name" in fields:
+        q = q.outerjoin(Category, Product.category_id == Category.id)
+    return q
+
+def get_product_summaries(db: Session, fields: list[str], skip: int = 0, limit: int = 100):
+    rows = _summary_query(db, fields).order_by(Product.id).offset(skip).limit(limit).all()
+    return [{f: getattr(row, f) for f in fields} for row in rows]
+
+def get_product_summaries_page(
+    db: Session,
+    fields: list[str],
+    limit: int = 100,
+    sort: str = "newest",
+    cursor: str | None = None,
+    criteria=(),
+):
+    """Keyset-paginated variant of get_product_summaries. Returns (summaries, next_cursor)."""
+    sort_column = PRODUCT_SORTS[sort][0] if sort in PRODUCT_SORTS else None
+    q = _summary_query(db, fields, extra_columns=[sort_column] if sort_column is not None else [])
+    for criterion in criteria:
+        q = q.filter(criterion)
+    rows, next_cursor = _keyset_page(_apply_keyset(q, sort, limit, cursor).all(), sort, limit)
+    return [{f: getattr(row, f) for f in fields} for row in rows], next_cursor
+
+# Upper edges of the discounted-price facet buckets
+PRICE_BUCKET_EDGES = (100.0, 250.0, 500.0, 1000.0, 2500.0, 5000.0)
+
+def _filter_clauses(filters: ProductFilter) -> dict:
+    """Map each facet (plus availability) to its SQL predicate; facets without a filter are omitted."""
+    clauses = {}
+    if filters.category_ids:
+        clauses["category"] = Product.category_id.in_(filters.category_ids)
+    if filters.brands:
+        clauses["brand"] = Product.brand.in_(filters.brands)
+    price = []
+    if filters.min_price is not None:
+        price.append(PRODUCT_EFFECTIVE_PRICE >= filters.min_price)
+    if filters.max_price is not None:
+        price.append(PRODUCT_EFFECTIVE_PRICE <= filters.max_price)
+    if price:
+        clauses["price"] = and_(*price)
+    if filters.min_rating is not None:
+        clauses["rating"] = Product.rating >= filters.min_rating
+    if filters.availability_status:
+        clauses["availability"] = Product.availability_status == filters.availability_status
+    return clauses
+
+def filter_products(
+    db: Session,
+    filters: ProductFilter,
+    fields: list[str],
+    limit: int = 100,
+    sort: str = "newest",
+    cursor: str | None = None,
+):
+    """Keyset page of product summaries matching every active filter. Returns (summaries, next_cursor)."""
+    return get_product_summaries_page(
+        db, fields, limit=limit, sort=sort, cursor=cursor,
+        criteria=_filter_clauses(filters).values(),
+    )
+
+def _price_bucket_bounds(bucket: int):
+    lower = PRICE_BUCKET_EDGES[bucket - 1] if bucket > 0 else None
+    upper = PRICE_BUCKET_EDGES[bucket] if bucket < len(PRICE_BUCKET_EDGES) else None
+    if lower is None:
+        label = f"<{upper:g}"
+    elif upper is None:
+        label = f"{lower:g}+"
+    else:
+        label = f"{lower:g}-{upper:g}"
+    return lower, upper, label
+
+def get_product_facets(db: Session, filters: ProductFilter) -> dict:
+    """
+    Facet counts for brand, category, rating bucket and price bucket in one GROUPING SETS query.
+    Each facet is counted with every filter except its own, so customers see how many
+    products they would get by changing that facet.
+    """
+    clauses = _filter_clauses(filters)
+
+    def excluding(facet: str):
+        return and_(true(), *[c for key, c in clauses.items() if key not in (facet, "availability")])
+
+    rating_bucket = cast(func.floor(func.coalesce(Product.rating, 0)), Integer)
+    price_bucket = func.width_bucket(PRODUCT_EFFECTIVE_PRICE, cast(array(PRICE_BUCKET_EDGES), ARRAY(Float)))
+
+    q = db.query(
+        Product.brand,
+        Product.category_id,
+        Category.name.label("category_name"),
+        rating_bucket.label("rating_bucket"),
+        price_bucket.label("price_bucket"),
+        func.grouping(Product.brand).label("g_brand"),
+        func.grouping(Product.category_id).label("g_category"),
+        func.grouping(rating_bucket).label("g_rating"),
+        func.grouping(price_bucket).label("g_price"),
+        func.count().filter(excluding("brand")).label("brand_count"),
+        func.count().filter(excluding("category")).label("category_count"),
+        func.count().filter(excluding("rating")).label("rating_count"),
+        func.count().filter(excluding("price")).label("price_count"),
+    ).select_from(Product).outerjoin(Category, Product.category_id == Category.id)
+    if "availability" in clauses:
+        q = q.filter(clauses["availability"])
+    q = q.group_by(func.grouping_sets(
+        tuple_(Product.brand),
+        tuple_(Product.category_id, Category.name),
+        tuple_(rating_bucket),
+        tuple_(price_bucket),
+    ))
+
+    facets = {"brand": [], "category": [], "rating": [], "price": []}
+    for row in q.all():
+        if row.g_brand == 0:
+            if row.brand is not None and row.brand_count:
+                facets["brand"].append({"value": row.brand, "label": row.brand, "count": row.brand_count})
+        elif row.g_category == 0:
+            if row.category_id is not None and row.category_count:
+                facets["category"].append({"value": row.category_id, "label": row.category_name, "count": row.category_count})
+        elif row.g_rating == 0:
+            if row.rating_count:
+                facets["rating"].append({"value": row.rating_bucket, "count": row.rating_count})
+        elif row.g_price == 0:
+            if row.price_bucket is not None and row.price_count:
+                lower, upper, label = _price_bucket_bounds(row.price_bucket)
+                facets["price"].append({
+                    "value": row.price_bucket, "label": label, "count": row.price_count,
+                    "min": lower, "max": upper,
+                })
+
+    facets["brand"].sort(key=lambda f: (-f["count"], f["label"]))
+    facets["category"].sort(key=lambda f: (-f["count"], f["label"] or ""))
+    facets["rating"].sort(key=lambda f: -f["value"])
+    facets["price"].sort(key=lambda f: f["value"])
+    return facets
+
+def search_products(
+    db: Session,
+    q: str,
+    fields: list[str],
+    category_id: int | None = None,
+    limit: int = 20,
+    cursor: str | None = None,
+):
+    """
+    Full-text search over Product.search_vector, best matches first.
+    Keyset-paginated on (rank, id). Returns (summaries, next_cursor).
+    """
+    if not q or not q.strip():
+        raise ValueError("Search query must not be empty")
+    if limit <= 0:
+        raise ValueError("Limit must be greater than 0")
+
+    ts_query = func.websearch_to_tsquery("english", q)
+    # ts_rank returns real; compare as double so ranks round-trip exactly through the cursor
+    rank = cast(func.ts_rank(Product.search_vector, ts_query), Float)
+
+    query = _summary_query(db, fields, extra_columns=[rank.label("rank")]).filter(
+        Product.search_vector.op("@@")(ts_query)
+    )
+    if category_id is not None:
+        query = query.filter(Product.category_id == category_id)
+
+    if cursor:
+        values = decode_cursor(cursor, "search")
+        try:
+            last_rank, last_id = float(values[0]), int(values[1])
+        except (IndexError, TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+        query = query.filter(tuple_(rank, Product.id) < tuple_(last_rank, last_id))
+
+    rows = query.order_by(rank.desc(), Product.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor("search", [rows[-1].rank, rows[-1].id])
+    return [{f: getattr(row, f) for f in fields} for row in rows], next_cursor
+
+# Autocomplete (see suggest.py)
+def _suggestion_rows_query(db: Session):
+    return db.query(
+        Product.id,
+        Product.name,
+        Product.brand,
+        Product.tags,
+        Product.rating,
+        Product.review_count,
+        Category.name.label("category_name"),
+    ).outerjoin(Category, Product.category_id == Category.id)
+
+def _load_suggestion_rows():
+    # Rebuilds run on a background thread, so they read through their own (primary) session
+    with SessionLocal() as db:
+        yield from _suggestion_rows_query(db).yield_per(5000)
+
+def get_suggestions(prefix: str, limit: int = 10):
+    if limit <= 0:
+        raise ValueError("Limit must be greater than 0")
+    suggest_index.ensure_built(_load_suggestion_rows)
+    return suggest_index.suggest(prefix, limit=limit)
+
+def _refresh_suggestions(db: Session, product_id: int):
+    """Re-index one product after a committed write."""
+    row = _suggestion_rows_query(db).filter(Product.id == product_id).first()
+    if row is None:
+        suggest_index.remove(product_id)
+    else:
+        suggest_index.upsert(row)
+
+def get_related_products(db: Session, product_id: int, fields: list[str], limit: int = 10):
+    """Precomputed "frequently bought together" neighbours (see recommendations.py), best first."""
+    if limit <= 0:
+        raise ValueError("Limit must be greater than 0")
+    rows = _summary_query(db, fields, extra_columns=(ProductRecommendation.score,)).join(
+        ProductRecommendation, ProductRecommendation.related_product_id == Product.id
+    ).filter(
+        ProductRecommendation.product_id == product_id
+    ).order_by(ProductRecommendation.rank).limit(limit).all()
+    return [{**{f: getattr(row, f) for f in fields}, "score": row.score} for row in rows]
 
 def get_product(db: Session, product_id: int):
     return db.query(Product).options(
@@ -56,6 +443,8 @@ def create_product(db: Session, product: ProductCreate):
     db.add(db_product)
     db.commit()
     db.refresh(db_product)
+    _invalidate_products()
+    _refresh_suggestions(db, db_product.id)
     return db_product
 
 def update_product(db: Session, product_id: int, product: ProductUpdate):
@@ -65,6 +454,8 @@ def update_product(db: Session, product_id: int, product: ProductUpdate):
             setattr(db_product, key, value)
         db.commit()
         db.refresh(db_product)
+        _invalidate_products(product_id)
+        _refresh_suggestions(db, product_id)
     return db_product
 
 def delete_product(db: Session, product_id: int):
@@ -72,33 +463,135 @@ def delete_product(db: Session, product_id: int):
     if db_product:
         db.delete(db_product)
         db.commit()
+        _invalidate_products(product_id)
+        suggest_index.remove(product_id)
     return db_product
 
 # Review CRUD
-def get_reviews_by_product(db: Session, product_id: int):
-    return db.query(Review).filter(Review.product_id == product_id).all()
+STAR_COUNT_COLUMNS = {
+    1: Product.rating_1_count,
+    2: Product.rating_2_count,
+    3: Product.rating_3_count,
+    4: Product.rating_4_count,
+    5: Product.rating_5_count,
+}
+
+def _rating_average(total, count):
+    return case((count > 0, func.round(cast(total, Numeric) / count, 2)), else_=0.0)
+
+def _apply_review_delta(db: Session, product_id: int, count_delta: int, total_delta: int, star_deltas: dict):
+    """
+    O(1) update of a product's review aggregates in the caller's transaction.
+    Also bumps Product.updated_at, since reviews are part of the product representation.
+    """
+    new_count = Product.review_count + count_delta
+    new_total = Product.rating_total + total_delta
+    values = {
+        Product.review_count: new_count,
+        Product.rating_total: new_total,
+        Product.rating: _rating_average(new_total, new_count),
+    }
+    for stars, delta in star_deltas.items():
+        if delta:
+            star_column = STAR_COUNT_COLUMNS[stars]
+            values[star_column] = star_column + delta
+    db.query(Product).filter(Product.id == product_id).update(values, synchronize_session=False)
+
+def recompute_review_aggregates(db: Session) -> int:
+    """Rebuild rating, review_count and the star histogram of every product with one grouped UPDATE."""
+    agg = select(
+        Product.id.label("product_id"),
+        func.count(Review.id).label("review_count"),
+        func.coalesce(func.sum(Review.rating), 0).label("rating_total"),
+        *[
+            func.count(Review.id).filter(Review.rating == stars).label(f"rating_{stars}_count")
+            for stars in STAR_COUNT_COLUMNS
+        ],
+    ).outerjoin(Review, Review.product_id == Product.id).group_by(Product.id).subquery()
+
+    values = {
+        Product.review_count: agg.c.review_count,
+        Product.rating_total: agg.c.rating_total,
+        Product.rating: _rating_average(agg.c.rating_total, agg.c.review_count),
+    }
+    for stars, star_column in STAR_COUNT_COLUMNS.items():
+        values[star_column] = agg.c[f"rating_{stars}_count"]
+
+    result = db.execute(
+        update(Product).where(Product.id == agg.c.product_id).values(values),
+        execution_options={"synchronize_session": False},
+    )
+    db.commit()
+    catalog_cache.invalidate_namespace("product")
+    _invalidate_products()
+    suggest_index.mark_stale()
+    return result.rowcount
+
+# Keyset sorts for a product's reviews, backed by the (product_id, ..., id) indexes on reviews
+REVIEW_SORTS = {
+    "newest": (Review.date, True, datetime.fromisoformat),
+    "highest": (Review.rating, True, int),
+    "lowest": (Review.rating, False, int),
+}
+
+def get_review_summary(db: Session, product_id: int):
+    """
+    Aggregates and version of a product, read from the product row alone.
+    Returns None when the product doesn't exist, so it doubles as a cheap existence check.
+    """
+    return db.query(
+        Product.id,
+        Product.created_at,
+        Product.updated_at,
+        Product.rating,
+        Product.review_count,
+        *STAR_COUNT_COLUMNS.values(),
+    ).filter(Product.id == product_id).first()
+
+def get_reviews_page(db: Session, product_id: int, limit: int = 20, sort: str = "newest", cursor: str | None = None):
+    """Keyset page of a product's reviews. Returns (reviews, next_cursor)."""
+    q = db.query(Review).filter(Review.product_id == product_id)
+    reviews = _apply_keyset(q, sort, limit, cursor, sorts=REVIEW_SORTS, id_column=Review.id).all()
+    return _keyset_page(reviews, sort, limit, sorts=REVIEW_SORTS)
 
 def create_review(db: Session, product_id: int, review: ReviewCreate):
     db_review = Review(product_id=product_id, **review.model_dump())
     db.add(db_review)
+    _apply_review_delta(db, product_id, 1, db_review.rating, {db_review.rating: 1})
     db.commit()
     db.refresh(db_review)
+    _invalidate_products(product_id)
+    _refresh_suggestions(db, product_id)
     return db_review
 
 def update_review(db: Session, review_id: int, review: ReviewUpdate):
-    db_review = db.query(Review).filter(Review.id == review_id).first()
+    # Lock the review so concurrent edits can't apply deltas from the same old rating
+    db_review = db.query(Review).filter(Review.id == review_id).with_for_update().first()
     if db_review:
+        old_rating = db_review.rating
         for key, value in review.model_dump().items():
             setattr(db_review, key, value)
+        if db_review.rating != old_rating:
+            star_deltas = {old_rating: -1, db_review.rating: 1}
+        else:
+            star_deltas = {}
+        # Applied even when the rating is unchanged, to bump the product's version
+        _apply_review_delta(db, db_review.product_id, 0, db_review.rating - old_rating, star_deltas)
         db.commit()
         db.refresh(db_review)
+        _invalidate_products(db_review.product_id)
+        _refresh_suggestions(db, db_review.product_id)
     return db_review
 
 def delete_review(db: Session, review_id: int):
-    db_review = db.query(Review).filter(Review.id == review_id).first()
+    db_review = db.query(Review).filter(Review.id == review_id).with_for_update().first()
     if db_review:
+        product_id = db_review.product_id
+        _apply_review_delta(db, product_id, -1, -db_review.rating, {db_review.rating: -1})
         db.delete(db_review)
         db.commit()
+        _invalidate_products(product_id)
+        _refresh_suggestions(db, product_id)
     return db_review
 
 # User CRUD
@@ -188,6 +681,56 @@ def get_user_refresh_tokens(db: Session, user_id: int):
     ).all()
 
 # Cart CRUD
+CART_VIEWS = ("full", "compact")
+
+# Compact cart lines are read as plain columns, without Product entities or their relationships
+CART_LINE_COLUMNS = (
+    CartItem.id,
+    CartItem.product_id,
+    CartItem.quantity,
+    Product.name,
+    Product.thumbnail,
+    Product.price,
+    Product.discount_percentage,
+    Product.stock_quantity,
+)
+
+def cart_lines_query(user_id: int):
+    return select(*CART_LINE_COLUMNS).join(
+        Product, Product.id == CartItem.product_id
+    ).join(
+        Cart, Cart.id == CartItem.cart_id
+    ).where(Cart.user_id == user_id).order_by(CartItem.id)
+
+def cart_summary(rows) -> dict:
+    """Compact cart (schemas.CartSummary) with the line and cart totals computed here."""
+    items = []
+    subtotal = total = 0.0
+    for row in rows:
+        price = float(row.price or 0.0)
+        discount_percentage = float(row.discount_percentage or 0.0)
+        line_total = round(price * (1 - discount_percentage / 100) * row.quantity, 2)
+        subtotal += price * row.quantity
+        total += line_total
+        items.append({
+            "id": row.id,
+            "product_id": row.product_id,
+            "name": row.name,
+            "thumbnail": row.thumbnail,
+            "unit_price": price,
+            "discount_percentage": discount_percentage,
+            "quantity": row.quantity,
+            "line_total": line_total,
+            "in_stock": (row.stock_quantity or 0) >= row.quantity,
+        })
+    return {
+        "items": items,
+        "item_count": sum(item["quantity"] for item in items),
+        "subtotal": round(subtotal, 2),
+        "discount": round(subtotal - total, 2),
+        "total": round(total, 2),
+    }
+
 def get_or_create_cart(db: Session, user_id: int) -> Cart:
     cart = db.query(Cart).filter(Cart.user_id == user_id).first()
     if not cart:
@@ -199,64 +742,192 @@ def get_or_create_cart(db: Session, user_id: int) -> Cart:
 
 def get_cart(db: Session, user_id: int) -> Cart:
     cart = get_or_create_cart(db, user_id)
+    # Everything schemas.Cart serializes is loaded here, in a fixed number of queries
     return db.query(Cart).options(
-        joinedload(Cart.cart_items).joinedload(CartItem.product)
+        joinedload(Cart.cart_items).joinedload(CartItem.product).options(
+            joinedload(Product.category_rel),
+            selectinload(Product.reviews),
+        )
     ).filter(Cart.id == cart.id).first()
 
-def add_to_cart(db: Session, user_id: int, product_id: int, quantity: int = 1) -> Cart:
+def get_cart_summary(db: Session, user_id: int) -> dict:
+    return cart_summary(db.execute(cart_lines_query(user_id)).all())
+
+def _cart_view(db: Session, user_id: int, view: str):
+    return get_cart_summary(db, user_id) if view == "compact" else get_cart(db, user_id)
+
+_CART_ITEM_RETURNING = (CartItem.id, CartItem.cart_id, CartItem.product_id, CartItem.quantity)
+
+def _cart_mutation_result(db: Session, user_id: int, line, view: str | None):
+    """The changed line (quantity 0 once removed), or the whole cart when a view was asked for."""
+    if view is not None:
+        return _cart_view(db, user_id, view)
+    return {"id": line.id, "cart_id": line.cart_id, "product_id": line.product_id, "quantity": line.quantity}
+
+def add_to_cart(db: Session, user_id: int, product_id: int, quantity: int = 1, view: str | None = None):
+    """
+    One statement: the cart is created on first use and the line inserted or incremented
+    with ON CONFLICT, so concurrent adds of the same product add up instead of racing.
+    """
     if quantity <= 0:
         raise ValueError("Quantity must be greater than 0")
 
-    # Ensure product exists
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if not product:
+    cart = insert(Cart).values(user_id=user_id).on_conflict_do_update(
+        index_elements=[Cart.user_id], set_={"updated_at": func.now()}
+    ).returning(Cart.id).cte("cart")
+    stmt = insert(CartItem).from_select(
+        ["cart_id", "product_id", "quantity"],
+        select(cart.c.id, bindparam("product_id", product_id), bindparam("quantity", quantity)),
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_cart_product",
+        set_={"quantity": CartItem.quantity + stmt.excluded.quantity, "updated_at": func.now()},
+    ).returning(*_CART_ITEM_RETURNING)
+    try:
+        line = db.execute(stmt).one()
+    except IntegrityError:  # cart_items.product_id FK
+        db.rollback()
         raise ValueError("Product not found")
+    db.commit()
+    return _cart_mutation_result(db, user_id, line, view)
 
-    cart = get_or_create_cart(db, user_id)
-    item = db.query(CartItem).filter(
-        CartItem.cart_id == cart.id,
-        CartItem.product_id == product_id
-    ).first()
-
-    if item:
-        item.quantity += quantity
-    else:
-        item = CartItem(cart_id=cart.id, product_id=product_id, quantity=quantity)
-        db.add(item)
+def set_cart_item_quantity(db: Session, user_id: int, product_id: int, quantity: int, view: str | None = None):
+    if quantity <= 0:
+        return remove_from_cart(db, user_id, product_id, view)
 
+    line = db.execute(
+        update(CartItem).where(
+            CartItem.cart_id == Cart.id, Cart.user_id == user_id, CartItem.product_id == product_id
+        ).values(quantity=quantity).returning(*_CART_ITEM_RETURNING),
+        execution_options={"synchronize_session": False},
+    ).first()
+    if line is None:
+        raise ValueError("Cart item not found")
     db.commit()
-    return get_cart(db, user_id)
-
-def set_cart_item_quantity(db: Session, user_id: int, product_id: int, quantity: int) -> Cart:
-    cart = get_or_create_cart(db, user_id)
-    item = db.query(CartItem).filter(
-        CartItem.cart_id == cart.id,
-        CartItem.product_id == product_id
+    return _cart_mutation_result(db, user_id, line, view)
+
+def remove_from_cart(db: Session, user_id: int, product_id: int, view: str | None = None):
+    line = db.execute(
+        delete(CartItem).where(
+            CartItem.cart_id == Cart.id, Cart.user_id == user_id, CartItem.product_id == product_id
+        ).returning(CartItem.id, CartItem.cart_id, CartItem.product_id, literal(0).label("quantity")),
+        execution_options={"synchronize_session": False},
     ).first()
-
-    if not item:
+    if line is None:
         raise ValueError("Cart item not found")
+    db.commit()
+    return _cart_mutation_result(db, user_id, line, view)
 
-    if quantity <= 0:
-        db.delete(item)
-    else:
-        item.quantity = quantity
+CART_BATCH_OPS = ("add", "set", "remove")
 
-    db.commit()
-    return get_cart(db, user_id)
+def existing_product_ids(db: Session, product_ids) -> set:
+    return set(db.execute(select(Product.id).where(Product.id.in_(list(product_ids)))).scalars())
 
-def remove_from_cart(db: Session, user_id: int, product_id: int) -> Cart:
-    cart = get_or_create_cart(db, user_id)
-    item = db.query(CartItem).filter(
-        CartItem.cart_id == cart.id,
-        CartItem.product_id == product_id
-    ).first()
-    if not item:
-        raise ValueError("Cart item not found")
+def _upsert_cart_lines(db: Session, cart_id: int, lines: list, increment: bool):
+    stmt = insert(CartItem).values([
+        {"cart_id": cart_id, "product_id": product_id, "quantity": quantity} for product_id, quantity in sorted(lines)
+    ])
+    quantity = CartItem.quantity + stmt.excluded.quantity if increment else stmt.excluded.quantity
+    db.execute(stmt.on_conflict_do_update(
+        constraint="uq_cart_product", set_={"quantity": quantity, "updated_at": func.now()}
+    ))
 
-    db.delete(item)
+def apply_cart_batch(db: Session, user_id: int, operations: list, view: str = "full"):
+    """
+    Apply add/set/remove operations in one transaction. Operations are folded per product
+    first (in order), so the writes are at most one increment upsert, one set upsert and one
+    DELETE, whatever the batch size. Unlike the single-item routes, set creates a missing
+    line and remove of a missing line is a no-op, so a batch can be replayed.
+    """
+    # product_id -> (absolute, quantity): absolute=False is an increment of the current quantity
+    final = {}
+    for operation in operations:
+        if operation.op not in CART_BATCH_OPS:
+            raise ValueError(f"Unsupported cart operation: {operation.op}")
+        absolute, quantity = final.get(operation.product_id, (False, 0))
+        if operation.op == "add":
+            if operation.quantity <= 0:
+                raise ValueError("Quantity must be greater than 0")
+            final[operation.product_id] = (absolute, quantity + operation.quantity)
+        elif operation.op == "set":
+            final[operation.product_id] = (True, max(operation.quantity, 0))
+        else:
+            final[operation.product_id] = (True, 0)
+
+    missing = sorted(set(final) - existing_product_ids(db, final))
+    if missing:
+        raise ValueError(f"Product not found: {', '.join(map(str, missing))}")
+
+    cart_id = db.execute(
+        insert(Cart).values(user_id=user_id).on_conflict_do_update(
+            index_elements=[Cart.user_id], set_={"updated_at": func.now()}
+        ).returning(Cart.id)
+    ).scalar_one()
+
+    increments = [(pid, q) for pid, (absolute, q) in final.items() if not absolute and q > 0]
+    sets = [(pid, q) for pid, (absolute, q) in final.items() if absolute and q > 0]
+    removals = [pid for pid, (absolute, q) in final.items() if absolute and q == 0]
+    if increments:
+        _upsert_cart_lines(db, cart_id, increments, increment=True)
+    if sets:
+        _upsert_cart_lines(db, cart_id, sets, increment=False)
+    if removals:
+        db.execute(
+            delete(CartItem).where(CartItem.cart_id == cart_id, CartItem.product_id.in_(removals)),
+            execution_options={"synchronize_session": False},
+        )
     db.commit()
-    return get_cart(db, user_id)
+    return _cart_view(db, user_id, view)
+
+# Guest carts (guest_cart.py) are product_id -> quantity dicts held outside the database
+def get_guest_cart_summary(db: Session, quantities: dict) -> dict:
+    """Compact view of a guest cart, read from products only. Line ids are the product ids."""
+    if not quantities:
+        return cart_summary([])
+    rows = db.execute(
+        select(
+            Product.id,
+            Product.id.label("product_id"),
+            _stock_lines.c.quantity,
+            Product.name,
+            Product.thumbnail,
+            Product.price,
+            Product.discount_percentage,
+            Product.stock_quantity,
+        ).join(_stock_lines, _stock_lines.c.product_id == Product.id).order_by(Product.id),
+        _stock_params(quantities),
+    ).all()
+    return cart_summary(rows)
+
+def merge_guest_cart(db: Session, user_id: int, quantities: dict) -> int:
+    """
+    Fold a guest cart into the user's cart with one statement: the cart row is upserted in a
+    CTE and every line inserted or incremented with ON CONFLICT. Products deleted since they
+    were added are skipped. Returns the number of lines merged; raises ValueError (after a
+    rollback) if the upsert fails, e.g. a product deleted concurrently.
+    """
+    if not quantities:
+        return 0
+    cart = insert(Cart).values(user_id=user_id).on_conflict_do_update(
+        index_elements=[Cart.user_id], set_={"updated_at": func.now()}
+    ).returning(Cart.id).cte("cart")
+    stmt = insert(CartItem).from_select(
+        ["cart_id", "product_id", "quantity"],
+        select(cart.c.id, _stock_lines.c.product_id, _stock_lines.c.quantity).select_from(cart).join(
+            _stock_lines, true()
+        ).join(Product, Product.id == _stock_lines.c.product_id).params(_stock_params(quantities)),
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_cart_product",
+        set_={"quantity": CartItem.quantity + stmt.excluded.quantity, "updated_at": func.now()},
+    ).returning(CartItem.id)
+    try:
+        merged = len(db.execute(stmt).all())
+    except SQLAlchemyError:
+        db.rollback()
+        raise ValueError("Guest cart could not be merged")
+    db.commit()
+    return merged
 
 def clear_cart(db: Session, user_id: int):
     cart = get_or_create_cart(db, user_id)
@@ -356,8 +1027,16 @@ def mark_payment_failed(
     payment.error_code = error_code
     payment.error_description = error_description
 
+    # Give the stock back until the buyer retries (see reserve_order_stock)
+    db_order = db.query(Order).filter(Order.id == order_id).with_for_update().first()
+    released = []
+    if db_order and db_order.payment_status != "paid":
+        db_order.payment_status = "failed"
+        released = _release_order_stock(db, db_order)
+
     db.commit()
     db.refresh(payment)
+    _invalidate_products(*released)
     return payment
 
 def get_payments_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 100):
@@ -365,6 +1044,83 @@ def get_payments_by_user(db: Session, user_id: int, skip: int = 0, limit: int =
         PaymentTransaction.user_id == user_id
     ).order_by(PaymentTransaction.created_at.desc()).offset(skip).limit(limit).all()
 
+# Stock reservation
+# (product_id, quantity) lines, bound as two arrays so both statements are built and cached once
+_stock_lines = func.unnest(
+    bindparam("product_ids", type_=ARRAY(Integer)), bindparam("quantities", type_=ARRAY(Integer))
+).table_valued(column("product_id", Integer), column("quantity", Integer)).render_derived(name="lines")
+
+_RESERVE_STOCK = update(Product).where(
+    Product.id == _stock_lines.c.product_id, Product.stock_quantity >= _stock_lines.c.quantity
+).values(stock_quantity=Product.stock_quantity - _stock_lines.c.quantity).returning(
+    Product.id, Product.stock_quantity, Product.updated_at
+).execution_options(
+    synchronize_session=False
+)
+
+_RELEASE_STOCK = update(Product).where(Product.id == _stock_lines.c.product_id).values(
+    stock_quantity=Product.stock_quantity + _stock_lines.c.quantity
+).execution_options(synchronize_session=False)
+
+def _stock_params(quantities: dict) -> dict:
+    # id order, so concurrent orders lock product rows in the same order
+    product_ids = sorted(quantities)
+    return {"product_ids": product_ids, "quantities": [quantities[i] for i in product_ids]}
+
+def _reserve_stock(db: Session, quantities: dict) -> list:
+    """
+    Take stock for all lines with one conditional UPDATE.
+    Rows without enough stock are not touched; any shortfall raises ValueError and the caller
+    must roll back. Call it as late as possible before commit: the row locks are held until then.
+    Returns (product_id, stock_quantity, updated_at) of the reserved rows.
+    """
+    reserved = db.execute(_RESERVE_STOCK, _stock_params(quantities)).all()
+    if len(reserved) < len(quantities):
+        missing = sorted(set(quantities) - {row.id for row in reserved})
+        raise ValueError(f"Insufficient stock for product(s): {', '.join(map(str, missing))}")
+    return reserved
+
+def _release_stock(db: Session, quantities: dict):
+    db.execute(_RELEASE_STOCK, _stock_params(quantities))
+
+def _order_quantities(db: Session, order_id: int) -> dict:
+    rows = db.query(OrderItem.product_id, func.sum(OrderItem.quantity)).filter(
+        OrderItem.order_id == order_id
+    ).group_by(OrderItem.product_id).all()
+    return {product_id: int(quantity) for product_id, quantity in rows}
+
+def _release_order_stock(db: Session, db_order: Order) -> list:
+    """Return a (locked) order's stock, in the caller's transaction. Returns the product ids released."""
+    if not db_order.stock_reserved:
+        return []
+    quantities = _order_quantities(db, db_order.id)
+    _release_stock(db, quantities)
+    db_order.stock_reserved = False
+    return list(quantities)
+
+def reserve_order_stock(db: Session, order_id: int):
+    """
+    Take stock again for an order that released it (payment failure), e.g. before a payment retry.
+    Raises ValueError when it is no longer available.
+    """
+    db_order = db.query(Order).filter(Order.id == order_id).with_for_update().first()
+    if db_order is None or db_order.stock_reserved:
+        return db_order
+    if db_order.status == "cancelled":
+        raise ValueError("Order is cancelled")
+    quantities = _order_quantities(db, order_id)
+    try:
+        _reserve_stock(db, quantities)
+    except ValueError:
+        db.rollback()
+        raise
+    db_order.stock_reserved = True
+    if db_order.payment_status == "failed":
+        db_order.payment_status = "pending"
+    db.commit()
+    _invalidate_products(*quantities)
+    return db_order
+
 # Order CRUD
 def create_order(db: Session, user_id: int, order: OrderCreate):
     """
@@ -372,49 +1128,103 @@ def create_order(db: Session, user_id: int, order: OrderCreate):
     - total is calculated from items
     - price is stored at purchase time (from current product.price)
     """
+    lines = [(item.product_id, item.quantity) for item in order.order_items]
+    return _place_order(db, user_id, order.shipping_address, order.payment_method, lines)
+
+def checkout_cart(db: Session, user_id: int, shipping_address: str, payment_method: str):
+    """
+    Turn the user's cart into an order in one transaction. The cart is read and emptied by a single
+    DELETE ... RETURNING, which also locks its rows against a concurrent checkout; if the order
+    fails, the rollback restores the cart.
+    """
+    lines = db.execute(
+        delete(CartItem).where(CartItem.cart_id == Cart.id, Cart.user_id == user_id)
+        .returning(CartItem.product_id, CartItem.quantity),
+        execution_options={"synchronize_session": False},
+    ).all()
+    try:
+        if not lines:
+            raise ValueError("Cart is empty")
+        return _place_order(db, user_id, shipping_address, payment_method, sorted(lines))
+    except ValueError:
+        db.rollback()
+        raise
+
+def _place_order(db: Session, user_id: int, shipping_address: str, payment_method: str, lines: list):
+    """
+    Write and commit an order for (product_id, quantity) lines, in the caller's transaction.
+    The statement count does not depend on the number of lines: one product fetch, the order
+    INSERT, the stock UPDATE and one multi-row item INSERT. The result is built from those rows.
+    """
+    quantities = {}
+    for product_id, quantity in lines:
+        if quantity <= 0:
+            raise ValueError("Quantity must be greater than 0")
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+
+    products = {
+        product.id: product
+        for product in db.query(Product).options(
+            joinedload(Product.category_rel),
+            joinedload(Product.reviews),
+        ).filter(Product.id.in_(quantities)).all()
+    }
+    for product_id, _ in lines:
+        if product_id not in products:
+            raise ValueError(f"Product not found: {product_id}")
+    # Unlocked early exit for sold-out items; _reserve_stock below is authoritative
+    short = [pid for pid, quantity in quantities.items() if (products[pid].stock_quantity or 0) < quantity]
+    if short:
+        raise ValueError(f"Insufficient stock for product(s): {', '.join(map(str, sorted(short)))}")
+
+    rows = []
+    for product_id, quantity in lines:
+        price = float(products[product_id].price)
+        rows.append({
+            "product_id": product_id,
+            "quantity": quantity,
+            "price": price,
+            "subtotal": price * quantity,
+        })
+
     db_order = Order(
         user_id=user_id,
         status="pending",
-        total_amount=0.0,
-        shipping_address=order.shipping_address,
-        payment_method=order.payment_method,
+        total_amount=sum(row["subtotal"] for row in rows),
+        shipping_address=shipping_address,
+        payment_method=payment_method,
         payment_status="pending",
+        stock_reserved=True,
     )
     db.add(db_order)
     db.flush()  # assign db_order.id without commit
 
-    total_amount = 0.0
-    for item in order.order_items:
-        if item.quantity <= 0:
-            raise ValueError("Quantity must be greater than 0")
-
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        if not product:
-            raise ValueError(f"Product not found: {item.product_id}")
-
-        price = float(product.price)
-        subtotal = price * item.quantity
-        total_amount += subtotal
-
-        db_item = OrderItem(
-            order_id=db_order.id,
-            product_id=item.product_id,
-            quantity=item.quantity,
-            price=price,
-            subtotal=subtotal,
-        )
-        db.add(db_item)
-
-    db_order.total_amount = total_amount
-
-    db.commit()
-    db.refresh(db_order)
-
-    # Return with relationships loaded
-    return db.query(Order).options(
-        joinedload(Order.user),
-        joinedload(Order.order_items).joinedload(OrderItem.product),
-    ).filter(Order.id == db_order.id).first()
+    # Reserve before the item rows are written, so their FK checks find the product rows already
+    # locked instead of share-locking hot products; the locks are then held for one INSERT and the commit
+    try:
+        reserved = _reserve_stock(db, quantities)
+        for row in rows:
+            row["order_id"] = db_order.id
+        items = db.scalars(insert(OrderItem).returning(OrderItem, sort_by_parameter_order=True), rows).all()
+    except ValueError:
+        db.rollback()
+        raise
+
+    # Keep the loaded rows through the commit and attach them as the order's relationships
+    expire_on_commit, db.expire_on_commit = db.expire_on_commit, False
+    try:
+        db.commit()
+    finally:
+        db.expire_on_commit = expire_on_commit
+    for product_id, stock_quantity, updated_at in reserved:
+        set_committed_value(products[product_id], "stock_quantity", stock_quantity)
+        set_committed_value(products[product_id], "updated_at", updated_at)
+    for db_item in items:
+        set_committed_value(db_item, "product", products[db_item.product_id])
+    set_committed_value(db_order, "order_items", items)
+    set_committed_value(db_order, "user", db.get(User, user_id))
+    _invalidate_products(*quantities)
+    return db_order
 
 def get_orders_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 100):
     return db.query(Order).options(
@@ -433,21 +1243,46 @@ def get_order(db: Session, order_id: int):
     ).filter(Order.id == order_id).first()
 
 def update_order_status(db: Session, order_id: int, order_update: OrderUpdate):
-    db_order = db.query(Order).filter(Order.id == order_id).first()
+    # Locked: the stock_reserved flag decides whether stock is returned or taken below
+    db_order = db.query(Order).filter(Order.id == order_id).with_for_update().first()
     if not db_order:
         return None
 
+    previous_status = db_order.status
     update_data = order_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_order, field, value)
 
+    # Cancelling returns the stock. Reopening a cancelled order takes it again, and so does a
+    # payment that succeeds after a failed attempt released it (the Razorpay modal allows retries)
+    touched = []
+    if db_order.status == "cancelled":
+        touched = _release_order_stock(db, db_order)
+    elif not db_order.stock_reserved and (previous_status == "cancelled" or db_order.payment_status == "paid"):
+        quantities = _order_quantities(db, db_order.id)
+        try:
+            _reserve_stock(db, quantities)
+        except ValueError:
+            db.rollback()
+            raise
+        db_order.stock_reserved = True
+        touched = list(quantities)
+
     db.commit()
     db.refresh(db_order)
+    _invalidate_products(*touched)
     return db.query(Order).options(
         joinedload(Order.user),
         joinedload(Order.order_items).joinedload(OrderItem.product),
     ).filter(Order.id == db_order.id).first()
 
+def flag_order_for_refund(db: Session, order_id: int):
+    """The order was paid but its stock is gone: keep it out of fulfilment and mark the payment for refund."""
+    db.query(Order).filter(Order.id == order_id).update(
+        {"payment_status": "refund_pending"}, synchronize_session=False
+    )
+    db.commit()
+
 def get_all_orders(db: Session, skip: int = 0, limit: int = 100):
     return db.query(Order).options(
         joinedload(Order.user),
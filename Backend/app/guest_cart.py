@@ -0,0 +1,78 @@
+"""
+Carts for visitors who are not logged in.
+
+A guest cart is a product_id -> quantity dict in a bounded in-process TTLCache (LRU eviction
+plus expiry), keyed by a random id carried in a signed cookie, so anonymous browsing never
+writes to Postgres. At login it is merged into the user's Cart by crud.merge_guest_cart.
+The store is per process: run one worker, or route guests by the cookie (sticky sessions).
+"""
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+
+from auth import SECRET_KEY
+from cache import TTLCache
+
+GUEST_CART_COOKIE = "guest_cart"
+GUEST_CART_TTL_SECONDS = int(os.getenv("GUEST_CART_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+GUEST_CART_MAX_ENTRIES = int(os.getenv("GUEST_CART_MAX_ENTRIES", "10000"))
+GUEST_CART_MAX_LINES = 100
+# Keeps merged quantities well inside cart_items.quantity (INTEGER)
+GUEST_CART_MAX_QUANTITY = 1000
+
+guest_carts = TTLCache(max_entries=GUEST_CART_MAX_ENTRIES, ttl_seconds=GUEST_CART_TTL_SECONDS)
+# Serializes read-modify-write of a cart, so concurrent adds to one cart add up
+_lock = threading.Lock()
+
+
+def _signature(cart_id: str) -> str:
+    return hmac.new(SECRET_KEY.encode(), f"{GUEST_CART_COOKIE}:{cart_id}".encode(), hashlib.sha256).hexdigest()
+
+
+def new_cart_id() -> str:
+    return secrets.token_urlsafe(18)
+
+
+def sign(cart_id: str) -> str:
+    return f"{cart_id}.{_signature(cart_id)}"
+
+
+def unsign(cookie: str | None) -> str | None:
+    """The cart id in a cookie value, or None if it is missing or the signature does not match."""
+    if not cookie:
+        return None
+    cart_id, _, signature = cookie.rpartition(".")
+    if not cart_id or not hmac.compare_digest(signature, _signature(cart_id)):
+        return None
+    return cart_id
+
+
+def get_lines(cart_id: str | None) -> dict:
+    if cart_id is None:
+        return {}
+    return dict(guest_carts.get((GUEST_CART_COOKIE, cart_id)) or {})
+
+
+def update_line(cart_id: str, product_id: int, quantity: int, increment: bool) -> dict:
+    """Add to (increment=True) or set a line; a quantity <= 0 removes it. Every write restarts the TTL."""
+    key = (GUEST_CART_COOKIE, cart_id)
+    with _lock:
+        lines = dict(guest_carts.get(key) or {})
+        if increment:
+            quantity += lines.get(product_id, 0)
+        if quantity > GUEST_CART_MAX_QUANTITY:
+            raise ValueError(f"Quantity must be at most {GUEST_CART_MAX_QUANTITY}")
+        if quantity > 0:
+            if product_id not in lines and len(lines) >= GUEST_CART_MAX_LINES:
+                raise ValueError(f"A guest cart can hold at most {GUEST_CART_MAX_LINES} products")
+            lines[product_id] = quantity
+        else:
+            lines.pop(product_id, None)
+        guest_carts.set(key, lines)
+    return dict(lines)
+
+
+def discard(cart_id: str):
+    guest_carts.invalidate((GUEST_CART_COOKIE, cart_id))
@@ -0,0 +1,147 @@
+"""
+Idempotency-Key support for POSTs that clients retry (order creation, Razorpay orders).
+
+The first request with a key claims it, runs, and stores its response; replays get the stored
+response without running the handler again, and a duplicate that arrives while the first is still
+running waits for it. Claims are written in their own committed transaction, so every worker and
+every concurrent request sees them at once.
+"""
+import hashlib
+import json
+import os
+import time
+from datetime import timedelta
+from typing import Callable
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from database import SessionLocal
+from models import IdempotencyKey
+
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+# An in-progress claim older than this is taken to belong to a crashed request and can be taken over
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+# How long a concurrent duplicate waits for the original before answering 409
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+MAX_KEY_LENGTH = 255
+_POLL_SECONDS = 0.05
+
+
+def fingerprint(payload: BaseModel) -> str:
+    body = json.dumps(payload.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def _claim(user_id: int, endpoint: str, key: str, digest: str) -> int | None:
+    """Claim the key (or take over an expired claim). Returns the claim id, or None if someone else holds it."""
+    stmt = insert(IdempotencyKey).values(
+        user_id=user_id,
+        endpoint=endpoint,
+        key=key,
+        fingerprint=digest,
+        status="in_progress",
+        expires_at=func.now() + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS),
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_idempotency_keys_user_endpoint_key",
+        set_={
+            "fingerprint": stmt.excluded.fingerprint,
+            "status": "in_progress",
+            "response_status": None,
+            "response_body": None,
+            "created_at": func.now(),
+            "expires_at": stmt.excluded.expires_at,
+        },
+        where=IdempotencyKey.expires_at < func.now(),
+    ).returning(IdempotencyKey.id)
+
+    with SessionLocal() as db:
+        # Expired keys of this user are dropped as they are passed, which keeps the table bounded
+        db.execute(delete(IdempotencyKey).where(
+            IdempotencyKey.user_id == user_id, IdempotencyKey.expires_at < func.now()
+        ))
+        claim_id = db.execute(stmt).scalar()
+        db.commit()
+    return claim_id
+
+
+def _finish(claim_id: int, response: Response | None):
+    """Store a successful response for replays, or drop the claim so the request can be retried."""
+    with SessionLocal() as db:
+        if response is None:
+            db.execute(delete(IdempotencyKey).where(IdempotencyKey.id == claim_id))
+        else:
+            db.execute(update(IdempotencyKey).where(IdempotencyKey.id == claim_id).values(
+                status="completed",
+                response_status=response.status_code,
+                response_body=response.body.decode(),
+                expires_at=func.now() + timedelta(seconds=IDEMPOTENCY_TTL_SECONDS),
+            ))
+        db.commit()
+
+
+def _replay(user_id: int, endpoint: str, key: str, digest: str) -> Response | None:
+    """
+    Wait for the request holding the key and return its stored response.
+    Returns None when the claim was released or has expired, so the caller can claim it again.
+    """
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        with SessionLocal() as db:
+            row = db.execute(select(
+                IdempotencyKey.fingerprint,
+                IdempotencyKey.status,
+                IdempotencyKey.response_status,
+                IdempotencyKey.response_body,
+                (IdempotencyKey.expires_at < func.now()).label("expired"),
+            ).where(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.endpoint == endpoint,
+                IdempotencyKey.key == key,
+            )).first()
+        if row is None or row.expired:
+            return None
+        if row.fingerprint != digest:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+        if row.status == "completed":
+            return Response(
+                content=row.response_body,
+                status_code=row.response_status,
+                media_type="application/json",
+                headers={"Idempotent-Replayed": "true"},
+            )
+        if time.monotonic() >= deadline:
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+        time.sleep(_POLL_SECONDS)
+
+
+def run(key: str | None, user_id: int, endpoint: str, payload: BaseModel, handler: Callable[[], Response]) -> Response:
+    """
+    Run handler() at most once per (user, endpoint, key) within the TTL.
+    Only 2xx responses are stored; errors (and exceptions) release the key, since their
+    transactions were rolled back and retrying is safe. Without a key handler() just runs.
+    """
+    if key is None:
+        return handler()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+
+    digest = fingerprint(payload)
+    while True:
+        claim_id = _claim(user_id, endpoint, key, digest)
+        if claim_id is not None:
+            break
+        replay = _replay(user_id, endpoint, key, digest)
+        if replay is not None:
+            return replay
+
+    try:
+        response = handler()
+    except BaseException:
+        _finish(claim_id, None)
+        raise
+    _finish(claim_id, response if 200 <= response.status_code < 300 else None)
+    return response
@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routers import products, categories, reviews, auth, orders, cart, payments, admin
+from compression import CompressionMiddleware
+from routers import products, categories, reviews, auth, orders, cart, guest_cart, checkout, payments, admin
 from database import engine
 from models import Base
 from models import User, Admin
@@ -78,6 +79,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/brotli above COMPRESSION_MIN_SIZE bytes
+app.add_middleware(CompressionMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["authentication"])
 app.include_router(products.router, prefix="/api/v1", tags=["products"])
@@ -85,6 +89,8 @@ app.include_router(categories.router, prefix="/api/v1", tags=["categories"])
 app.include_router(reviews.router, prefix="/api/v1", tags=["reviews"])
 app.include_router(orders.router, prefix="/api/v1", tags=["orders"])
 app.include_router(cart.router, prefix="/api/v1", tags=["cart"])
+app.include_router(guest_cart.router, prefix="/api/v1", tags=["guest cart"])
+app.include_router(checkout.router, prefix="/api/v1", tags=["checkout"])
 app.include_router(payments.router, prefix="/api/v1", tags=["payments"])
 app.include_router(admin.router, prefix="/api/v1/admin", tags=["admin"])
 
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, ARRAY, JSON, Boolean, UniqueConstraint
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, ARRAY, JSON, Boolean, UniqueConstraint, Index, Computed, DDL, event
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from database import Base
 
@@ -17,6 +18,17 @@ class Category(Base):
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Keyset pagination sorts (see crud.PRODUCT_SORTS)
+        Index("ix_products_created_at_id", "created_at", "id"),
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_search_vector", "search_vector", postgresql_using="gin"),
+        # Faceted filtering predicates (see crud.get_product_facets)
+        Index("ix_products_category_id", "category_id"),
+        Index("ix_products_brand", "brand"),
+        Index("ix_products_rating_id", "rating", "id"),
+        Index("ix_products_availability_status", "availability_status"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
@@ -25,6 +37,14 @@ class Product(Base):
     price = Column(Float, nullable=False)
     discount_percentage = Column(Float, default=0.0)
     rating = Column(Float, default=0.0)
+    # Review aggregates, maintained incrementally by crud review writes (see crud.recompute_review_aggregates)
+    review_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_total = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_1_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_2_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_3_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_4_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_5_count = Column(Integer, nullable=False, default=0, server_default="0")
     stock_quantity = Column(Integer, default=0)
     tags = Column(ARRAY(String), default=list)
     brand = Column(String(100))
@@ -42,14 +62,54 @@ class Product(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # Full-text search document, generated and kept current by Postgres (see /products/search).
+    # Deferred so regular product loads don't ship it over the wire.
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(brand, '')), 'B') || "
+        "setweight(to_tsvector('english', products_tags_to_text(tags)), 'B') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'C')",
+        persisted=True,
+    )))
+
     # Relationships
     category_rel = relationship("Category", back_populates="products")
     reviews = relationship("Review", back_populates="product", cascade="all, delete-orphan")
     order_items = relationship("OrderItem", back_populates="product")
     cart_items = relationship("CartItem", back_populates="product")
 
+    @property
+    def rating_histogram(self):
+        """Review counts for 1..5 stars."""
+        return [
+            self.rating_1_count or 0,
+            self.rating_2_count or 0,
+            self.rating_3_count or 0,
+            self.rating_4_count or 0,
+            self.rating_5_count or 0,
+        ]
+
+# Price after discount; the expression index below must match this expression exactly
+PRODUCT_EFFECTIVE_PRICE = Product.price * (1 - func.coalesce(Product.discount_percentage, 0) / 100)
+Index("ix_products_effective_price", PRODUCT_EFFECTIVE_PRICE)
+
+# array_to_string() is only STABLE, so generated columns need an IMMUTABLE wrapper for tags
+event.listen(
+    Product.__table__,
+    "before_create",
+    DDL(
+        "CREATE OR REPLACE FUNCTION products_tags_to_text(text[]) RETURNS text "
+        "LANGUAGE sql IMMUTABLE AS $$ SELECT coalesce(array_to_string($1, ' '), '') $$"
+    ),
+)
+
 class Review(Base):
     __tablename__ = "reviews"
+    __table_args__ = (
+        # Keyset pagination of a product's reviews (see crud.REVIEW_SORTS)
+        Index("ix_reviews_product_date_id", "product_id", "date", "id"),
+        Index("ix_reviews_product_rating_id", "product_id", "rating", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
@@ -71,7 +131,9 @@ class Order(Base):
     total_amount = Column(Float, nullable=False, default=0.0)
     shipping_address = Column(Text, nullable=False)
     payment_method = Column(String(50), nullable=False)  # razorpay, cash_on_delivery
-    payment_status = Column(String(50), default="pending")  # pending, paid, failed
+    payment_status = Column(String(50), default="pending")  # pending, paid, failed, refund_pending
+    # True while the order holds its items' stock (see crud._reserve_stock)
+    stock_reserved = Column(Boolean, nullable=False, default=False, server_default="false")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -214,4 +276,56 @@ class RefreshToken(Base):
     is_revoked = Column(Boolean, default=False)
 
     # Relationship with user
-    user = relationship("User", back_populates="refresh_tokens")
\ No newline at end of file
+    user = relationship("User", back_populates="refresh_tokens")
+
+class IdempotencyKey(Base):
+    """
+    Idempotency-Key claims for retried POSTs (see idempotency.py).
+    A claim is in_progress while its request runs, then completed with the stored response.
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("user_id", "endpoint", "key", name="uq_idempotency_keys_user_endpoint_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    endpoint = Column(String(100), nullable=False)
+    key = Column(String(255), nullable=False)
+    fingerprint = Column(String(64), nullable=False)  # sha256 of the request body
+    status = Column(String(20), nullable=False, default="in_progress")  # in_progress, completed
+    response_status = Column(Integer)
+    response_body = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+# "Frequently bought together" (see recommendations.py)
+class ProductPairCount(Base):
+    """Order co-occurrence counts, upper triangle only (product_id <= other_product_id).
+    The diagonal (product_id == other_product_id) holds the number of orders containing the product."""
+    __tablename__ = "product_pair_counts"
+
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    other_product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True, index=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class ProductRecommendation(Base):
+    __tablename__ = "product_recommendations"
+    __table_args__ = (
+        Index("ix_product_recommendations_product_rank", "product_id", "rank"),
+    )
+
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    related_product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    rank = Column(Integer, nullable=False)  # 1 = best
+    score = Column(Float, nullable=False)
+    co_count = Column(Integer, nullable=False)  # orders containing both products
+
+class RecommendationState(Base):
+    """Single row: watermark of the incremental co-occurrence job."""
+    __tablename__ = "recommendation_state"
+
+    id = Column(Integer, primary_key=True)
+    last_order_id = Column(Integer, nullable=False, default=0)
+    orders_processed = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,30 @@
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(sort: str, values: list) -> str:
+    """Encode the sort key of the last row of a page into an opaque cursor."""
+    payload = {
+        "s": sort,
+        "k": [value.isoformat() if isinstance(value, datetime) else value for value in values],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> list:
+    """Decode a cursor produced by encode_cursor. Raises ValueError if it is malformed or was issued for another sort."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = payload["k"]
+        cursor_sort = payload["s"]
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+    if cursor_sort != sort:
+        raise ValueError("Cursor does not match the requested sort")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
@@ -0,0 +1,112 @@
+"""
+Streaming catalog export. Rows come from a server-side cursor, so memory stays flat
+regardless of catalog size; the output round-trips through product_import.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterator
+
+from sqlalchemy import or_, and_, select
+
+from database import get_read_db
+from models import Product
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+# Rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = (
+    Product.id,
+    Product.sku,
+    Product.name,
+    Product.description,
+    Product.category_id,
+    Product.price,
+    Product.discount_percentage,
+    Product.stock_quantity,
+    Product.tags,
+    Product.brand,
+    Product.weight,
+    Product.dimensions,
+    Product.warranty_information,
+    Product.shipping_information,
+    Product.availability_status,
+    Product.return_policy,
+    Product.minimum_order_quantity,
+    Product.images,
+    Product.thumbnail,
+    Product.rating,
+    Product.review_count,
+    Product.created_at,
+    Product.updated_at,
+)
+_FIELD_NAMES = [column.key for column in EXPORT_COLUMNS]
+_JSON_FIELDS = {"tags", "images", "dimensions"}
+
+
+def _export_query(updated_since: datetime | None):
+    q = select(*EXPORT_COLUMNS).order_by(Product.id)
+    if updated_since is not None:
+        # Rows that were never updated only carry created_at
+        q = q.filter(or_(
+            Product.updated_at >= updated_since,
+            and_(Product.updated_at.is_(None), Product.created_at >= updated_since),
+        ))
+    return q
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _format_ndjson(rows) -> str:
+    return "".join(
+        json.dumps(dict(zip(_FIELD_NAMES, row)), default=_json_default) + "\n" for row in rows
+    )
+
+
+def _format_csv(rows, header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(_FIELD_NAMES)
+    for row in rows:
+        writer.writerow([
+            json.dumps(value) if name in _JSON_FIELDS and value is not None
+            else value.isoformat() if isinstance(value, datetime)
+            else value
+            for name, value in zip(_FIELD_NAMES, row)
+        ])
+    return buffer.getvalue()
+
+
+def export_products(fmt: str, updated_since: datetime | None = None) -> Iterator[str]:
+    """
+    Yield the catalog as NDJSON lines or CSV text, one chunk per cursor batch.
+    The generator owns its session: it outlives the request handler that returns the StreamingResponse.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    def generate():
+        sessions = get_read_db()
+        db = next(sessions)
+        try:
+            result = db.execute(
+                _export_query(updated_since).execution_options(yield_per=EXPORT_BATCH_SIZE)
+            )
+            header = True
+            for rows in result.partitions():
+                yield _format_ndjson(rows) if fmt == "ndjson" else _format_csv(rows, header)
+                header = False
+            if header and fmt == "csv":
+                yield _format_csv([], header=True)
+        finally:
+            sessions.close()
+
+    return generate()
@@ -0,0 +1,240 @@
+"""
+Bulk product import: CSV or NDJSON rows are validated in chunks against ProductCreate,
+COPY'd into a temporary staging table and upserted by sku in a single statement per chunk.
+"""
+import csv
+import io
+import json
+from itertools import islice
+from typing import IO, Iterator
+
+import psycopg2
+from pydantic import ValidationError
+from sqlalchemy import String, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from cache import catalog_cache
+from models import Category, Product
+from schemas import ProductCreate
+from suggest import suggest_index
+
+IMPORT_FORMATS = ("csv", "ndjson")
+DEFAULT_CHUNK_SIZE = 5000
+# Per-row errors kept in the report; the counters still cover every row
+MAX_REPORTED_ERRORS = 1000
+
+# Staging columns, in COPY order. List/dict fields travel as jsonb and are converted on insert.
+_STAGING_COLUMNS = (
+    ("sku", "text"),
+    ("name", "text"),
+    ("description", "text"),
+    ("category_id", "integer"),
+    ("price", "double precision"),
+    ("discount_percentage", "double precision"),
+    ("stock_quantity", "integer"),
+    ("tags", "jsonb"),
+    ("brand", "text"),
+    ("weight", "double precision"),
+    ("dimensions", "jsonb"),
+    ("warranty_information", "text"),
+    ("shipping_information", "text"),
+    ("availability_status", "text"),
+    ("return_policy", "text"),
+    ("minimum_order_quantity", "integer"),
+    ("images", "jsonb"),
+    ("thumbnail", "text"),
+)
+_JSON_FIELDS = {"tags", "images", "dimensions"}
+
+_UPSERT_COLUMNS = [name for name, _ in _STAGING_COLUMNS]
+# VARCHAR limits, checked up front so one long value doesn't fail its whole chunk
+_MAX_LENGTHS = {
+    column.name: column.type.length
+    for column in Product.__table__.columns
+    if column.name in _UPSERT_COLUMNS and isinstance(column.type, String) and column.type.length
+}
+_INSERT_VALUES = {
+    name: f"ARRAY(SELECT jsonb_array_elements_text(s.{name}))" if name in ("tags", "images")
+    else f"s.{name}::json" if name == "dimensions"
+    else f"s.{name}"
+    for name in _UPSERT_COLUMNS
+}
+_UPSERT_SQL = f"""
+    INSERT INTO products ({", ".join(_UPSERT_COLUMNS)}, rating)
+    SELECT {", ".join(_INSERT_VALUES[name] for name in _UPSERT_COLUMNS)}, 0.0
+    FROM product_import_staging s
+    ON CONFLICT (sku) DO UPDATE SET
+        {", ".join(f"{name} = EXCLUDED.{name}" for name in _UPSERT_COLUMNS if name != "sku")},
+        updated_at = now()
+    RETURNING (xmax = 0) AS inserted
+"""
+
+
+def iter_rows(stream: IO[str], fmt: str) -> Iterator[tuple[int, dict | None, str | None]]:
+    """
+    Yield (row_number, record, parse_error) for each row of a CSV or NDJSON text stream.
+    CSV cells for tags/images/dimensions hold JSON; tags/images may also be "|"-separated.
+    """
+    if fmt == "ndjson":
+        for row_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield row_number, None, f"Invalid JSON: {e.msg}"
+                continue
+            if not isinstance(record, dict):
+                yield row_number, None, "Row must be a JSON object"
+                continue
+            yield row_number, record, None
+        return
+
+    for row_number, row in enumerate(csv.DictReader(stream), start=1):
+        record = {}
+        error = None
+        for key, value in row.items():
+            if key is None:
+                error = "Row has more cells than the header"
+                break
+            # Empty cells fall back to the ProductCreate defaults
+            if value is None or value == "":
+                continue
+            if key in _JSON_FIELDS:
+                if value.lstrip().startswith(("[", "{")):
+                    try:
+                        value = json.loads(value)
+                    except json.JSONDecodeError as e:
+                        error = f"Invalid JSON in column '{key}': {e.msg}"
+                        break
+                elif key != "dimensions":
+                    value = [part.strip() for part in value.split("|") if part.strip()]
+            record[key] = value
+        yield row_number, (None if error else record), error
+
+
+def _validate_chunk(rows, category_ids: set, errors: list) -> list[tuple[int, ProductCreate]]:
+    """Validate a chunk of parsed rows; skus are deduplicated within the chunk (the last row wins)."""
+    valid: dict[str, tuple[int, ProductCreate]] = {}
+    for row_number, record, parse_error in rows:
+        if parse_error:
+            errors.append({"row": row_number, "sku": None, "error": parse_error})
+            continue
+        sku = record.get("sku")
+        try:
+            product = ProductCreate.model_validate(record)
+        except ValidationError as e:
+            detail = "; ".join(
+                f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+            )
+            errors.append({"row": row_number, "sku": sku, "error": detail})
+            continue
+        if not product.sku:
+            errors.append({"row": row_number, "sku": None, "error": "sku is required"})
+            continue
+        if not product.name.strip():
+            errors.append({"row": row_number, "sku": product.sku, "error": "name is required"})
+            continue
+        too_long = [name for name, length in _MAX_LENGTHS.items() if len(getattr(product, name) or "") > length]
+        if too_long:
+            errors.append({"row": row_number, "sku": product.sku, "error": f"Value too long for: {', '.join(too_long)}"})
+            continue
+        if product.category_id is not None and product.category_id not in category_ids:
+            errors.append({"row": row_number, "sku": product.sku, "error": f"Unknown category_id {product.category_id}"})
+            continue
+        previous = valid.pop(product.sku, None)
+        if previous is not None:
+            errors.append({
+                "row": previous[0],
+                "sku": product.sku,
+                "error": f"Duplicate sku, superseded by row {row_number}",
+            })
+        valid[product.sku] = (row_number, product)
+    return list(valid.values())
+
+
+def _copy_buffer(products: list[tuple[int, ProductCreate]]) -> io.StringIO:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    for _, product in products:
+        data = product.model_dump()
+        writer.writerow([
+            # None -> empty unquoted field, which COPY ... CSV reads as NULL
+            None if data[name] is None
+            else json.dumps(data[name]) if name in _JSON_FIELDS
+            else data[name]
+            for name in _UPSERT_COLUMNS
+        ])
+    buffer.seek(0)
+    return buffer
+
+
+def _upsert_chunk(db: Session, products: list[tuple[int, ProductCreate]]) -> tuple[int, int]:
+    """COPY one validated chunk into a staging table and upsert it. Returns (inserted, updated)."""
+    db.execute(text(
+        "CREATE TEMP TABLE product_import_staging ("
+        + ", ".join(f"{name} {sql_type}" for name, sql_type in _STAGING_COLUMNS)
+        + ") ON COMMIT DROP"
+    ))
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY product_import_staging ({', '.join(_UPSERT_COLUMNS)}) "
+            "FROM STDIN WITH (FORMAT csv)",
+            _copy_buffer(products),
+        )
+    finally:
+        cursor.close()
+    flags = db.execute(text(_UPSERT_SQL)).scalars().all()
+    db.commit()
+    inserted = sum(1 for flag in flags if flag)
+    return inserted, len(flags) - inserted
+
+
+def import_products(db: Session, stream: IO[str], fmt: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    """
+    Stream-import products from a CSV/NDJSON text stream, upserting by sku.
+    Each chunk is committed on its own; a chunk the database rejects is reported row by row.
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format: {fmt}")
+    if chunk_size <= 0:
+        raise ValueError("Chunk size must be greater than 0")
+    rows = iter_rows(stream, fmt)
+    category_ids = {category_id for (category_id,) in db.query(Category.id)}
+
+    report = {"received": 0, "inserted": 0, "updated": 0}
+    errors: list = []
+    try:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            report["received"] += len(chunk)
+            products = _validate_chunk(chunk, category_ids, errors)
+            if products:
+                try:
+                    inserted, updated = _upsert_chunk(db, products)
+                except (DBAPIError, psycopg2.Error) as e:
+                    # COPY runs on the raw DBAPI cursor, so its errors are not wrapped by SQLAlchemy
+                    db.rollback()
+                    message = str(getattr(e, "orig", None) or e).strip().splitlines()[0]
+                    errors.extend(
+                        {"row": row_number, "sku": product.sku, "error": message}
+                        for row_number, product in products
+                    )
+                else:
+                    report["inserted"] += inserted
+                    report["updated"] += updated
+    finally:
+        # Any committed chunk may have touched cached products
+        if report["inserted"] or report["updated"]:
+            catalog_cache.invalidate_namespace("product")
+            catalog_cache.invalidate_namespace("products")
+            catalog_cache.invalidate_namespace("category_stats")
+            suggest_index.mark_stale()
+
+    report["failed"] = len(errors)
+    report["errors"] = sorted(errors, key=lambda error: error["row"])[:MAX_REPORTED_ERRORS]
+    return report
@@ -0,0 +1,209 @@
+"""
+"Frequently bought together": an incremental batch job over order_items.
+
+Each run folds the orders created since the last watermark into a sparse co-occurrence
+matrix (product_pair_counts, upper triangle plus a diagonal of per-product order counts),
+then re-scores the products whose neighbourhoods changed and stores their top-N neighbours
+in product_recommendations. Pair generation and scoring are vectorized with NumPy.
+"""
+import os
+import time
+from datetime import timedelta
+
+import numpy as np
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models import Order, OrderItem, ProductPairCount, ProductRecommendation, RecommendationState
+
+RECOMMENDATION_METRICS = ("cosine", "lift")
+RECOMMENDATIONS_METRIC = os.getenv("RECOMMENDATIONS_METRIC", "cosine")
+RECOMMENDATIONS_TOP_N = int(os.getenv("RECOMMENDATIONS_TOP_N", "10"))
+# Minimum number of shared orders before a pair is recommended
+RECOMMENDATIONS_MIN_SUPPORT = int(os.getenv("RECOMMENDATIONS_MIN_SUPPORT", "1"))
+# Orders younger than this are left for the next run (see _high_water)
+RECOMMENDATIONS_WATERMARK_LAG_SECONDS = int(os.getenv("RECOMMENDATIONS_WATERMARK_LAG_SECONDS", "300"))
+_WRITE_BATCH_SIZE = 5000
+
+
+def basket_pairs(order_ids: np.ndarray, product_ids: np.ndarray):
+    """
+    Co-occurrence counts for a set of order lines, as (a, b, count) arrays with a <= b.
+    (a, a) counts the orders containing a. Quantities and repeated lines count once per order.
+    """
+    lines = np.unique(np.stack([order_ids, product_ids], axis=1), axis=0)
+    products = lines[:, 1]
+    # Lines are sorted by order, so every basket is a contiguous run
+    _, starts, sizes = np.unique(lines[:, 0], return_index=True, return_counts=True)
+
+    # Pair every line with each line of its own basket
+    size_per_line = np.repeat(sizes, sizes)
+    start_per_line = np.repeat(starts, sizes)
+    left = np.repeat(np.arange(len(products)), size_per_line)
+    block_starts = np.cumsum(size_per_line) - size_per_line
+    right = np.repeat(start_per_line, size_per_line) + np.arange(len(left)) - np.repeat(block_starts, size_per_line)
+
+    a, b = products[left], products[right]
+    keep = a <= b
+    pairs, counts = np.unique(np.stack([a[keep], b[keep]], axis=1), axis=0, return_counts=True)
+    return pairs[:, 0], pairs[:, 1], counts
+
+
+def top_neighbours(src, dst, co, diag_ids, diag_counts, total_orders: int, metric: str, top_n: int, min_support: int):
+    """
+    Score directed pairs (src -> dst, co = shared orders) and keep the best top_n per src.
+    cosine = co / sqrt(n_src * n_dst); lift = co * N / (n_src * n_dst).
+    Returns (src, dst, rank, score, co) arrays.
+    """
+    keep = co >= min_support
+    src, dst, co = src[keep], dst[keep], co[keep]
+    n_src = diag_counts[np.searchsorted(diag_ids, src)].astype(np.float64)
+    n_dst = diag_counts[np.searchsorted(diag_ids, dst)].astype(np.float64)
+    if metric == "lift":
+        score = co * float(total_orders) / (n_src * n_dst)
+    else:
+        score = co / np.sqrt(n_src * n_dst)
+
+    # Sort by src, then best score first (ties: more shared orders, then lower id)
+    order = np.lexsort((dst, -co, -score, src))
+    src, dst, co, score = src[order], dst[order], co[order], score[order]
+    group_starts = np.flatnonzero(np.r_[True, src[1:] != src[:-1]])
+    group_sizes = np.diff(np.r_[group_starts, len(src)])
+    rank = np.arange(len(src)) - np.repeat(group_starts, group_sizes) + 1
+    keep = rank <= top_n
+    return src[keep], dst[keep], rank[keep], score[keep], co[keep]
+
+
+def _lock_state(db: Session) -> RecommendationState:
+    """The state row doubles as a lock, so concurrent runs can't fold the same orders twice."""
+    db.execute(insert(RecommendationState).values(id=1, last_order_id=0, orders_processed=0).on_conflict_do_nothing())
+    return db.query(RecommendationState).filter(RecommendationState.id == 1).with_for_update().one()
+
+
+def _high_water(db: Session, last_order_id: int) -> int | None:
+    """
+    Highest order id that is safe to fold, or None. An order gets its id at flush but commits
+    later (the stock UPDATE can wait on row locks), so a plain max(id) can pass lower ids that
+    are still uncommitted. Only the run of ids below the first order younger than the lag is
+    taken; it misses an order only if its transaction stays open longer than the lag.
+    """
+    cutoff = func.now() - timedelta(seconds=RECOMMENDATIONS_WATERMARK_LAG_SECONDS)
+    newest = db.query(func.max(Order.id)).filter(Order.id > last_order_id, Order.created_at < cutoff).scalar()
+    if newest is None:
+        return None
+    first_recent = db.query(func.min(Order.id)).filter(Order.id > last_order_id, Order.created_at >= cutoff).scalar()
+    if first_recent is not None:
+        newest = min(newest, first_recent - 1)
+    return newest if newest > last_order_id else None
+
+
+def _upsert_pair_counts(db: Session, a, b, counts):
+    rows = [
+        {"product_id": int(x), "other_product_id": int(y), "count": int(c)}
+        for x, y, c in zip(a, b, counts)
+    ]
+    for start in range(0, len(rows), _WRITE_BATCH_SIZE):
+        stmt = insert(ProductPairCount).values(rows[start:start + _WRITE_BATCH_SIZE])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[ProductPairCount.product_id, ProductPairCount.other_product_id],
+            set_={"count": ProductPairCount.count + stmt.excluded.count},
+        ))
+
+
+def _rescore(db: Session, affected: list[int], total_orders: int, metric: str, top_n: int, min_support: int) -> int:
+    pairs = np.array(db.execute(
+        select(ProductPairCount.product_id, ProductPairCount.other_product_id, ProductPairCount.count).where(
+            ProductPairCount.product_id != ProductPairCount.other_product_id,
+            or_(ProductPairCount.product_id.in_(affected), ProductPairCount.other_product_id.in_(affected)),
+        )
+    ).all(), dtype=np.int64).reshape(-1, 3)
+
+    # Both directions of each pair, restricted to the products being re-scored
+    src = np.concatenate([pairs[:, 0], pairs[:, 1]])
+    dst = np.concatenate([pairs[:, 1], pairs[:, 0]])
+    co = np.concatenate([pairs[:, 2], pairs[:, 2]])
+    affected_ids = np.array(affected, dtype=np.int64)
+    mask = np.isin(src, affected_ids)
+    src, dst, co = src[mask], dst[mask], co[mask]
+
+    involved = np.unique(np.concatenate([src, dst]))
+    diag = np.array(db.execute(
+        select(ProductPairCount.product_id, ProductPairCount.count).where(
+            ProductPairCount.product_id == ProductPairCount.other_product_id,
+            ProductPairCount.product_id.in_(involved.tolist()),
+        ).order_by(ProductPairCount.product_id)
+    ).all(), dtype=np.int64).reshape(-1, 2)
+
+    src, dst, rank, score, co = top_neighbours(
+        src, dst, co, diag[:, 0], diag[:, 1], total_orders, metric, top_n, min_support
+    )
+
+    db.execute(delete(ProductRecommendation).where(ProductRecommendation.product_id.in_(affected)))
+    rows = [
+        {"product_id": int(s), "related_product_id": int(d), "rank": int(r), "score": float(v), "co_count": int(c)}
+        for s, d, r, v, c in zip(src, dst, rank, score, co)
+    ]
+    for start in range(0, len(rows), _WRITE_BATCH_SIZE):
+        db.execute(insert(ProductRecommendation), rows[start:start + _WRITE_BATCH_SIZE])
+    return len(rows)
+
+
+def build_recommendations(
+    db: Session,
+    full: bool = False,
+    metric: str = RECOMMENDATIONS_METRIC,
+    top_n: int = RECOMMENDATIONS_TOP_N,
+    min_support: int = RECOMMENDATIONS_MIN_SUPPORT,
+) -> dict:
+    """
+    Fold orders placed since the last run into the co-occurrence counts and refresh the
+    recommendations they affect, in one transaction. full=True starts over from the first order.
+    Cancelled orders are skipped when they are folded in; later cancellations are not subtracted.
+    """
+    if metric not in RECOMMENDATION_METRICS:
+        raise ValueError(f"Unsupported metric: {metric}")
+    if top_n <= 0:
+        raise ValueError("top_n must be greater than 0")
+    started = time.perf_counter()
+
+    state = _lock_state(db)
+    if full:
+        db.execute(delete(ProductRecommendation))
+        db.execute(delete(ProductPairCount))
+        state.last_order_id = 0
+        state.orders_processed = 0
+
+    # Fixed upper bound, so orders inserted while the job runs wait for the next run
+    high_water = _high_water(db, state.last_order_id)
+    report = {"orders_folded": 0, "pairs_updated": 0, "products_rescored": 0, "recommendations": 0}
+    if high_water is not None:
+        lines = np.array(db.execute(
+            select(OrderItem.order_id, OrderItem.product_id).join(Order, Order.id == OrderItem.order_id).where(
+                Order.id > state.last_order_id,
+                Order.id <= high_water,
+                Order.status != "cancelled",
+            )
+        ).all(), dtype=np.int64).reshape(-1, 2)
+
+        if len(lines):
+            a, b, counts = basket_pairs(lines[:, 0], lines[:, 1])
+            _upsert_pair_counts(db, a, b, counts)
+            folded = int(len(np.unique(lines[:, 0])))
+            state.orders_processed += folded
+
+            # Products in the new orders, plus every product that has one of them as a neighbour
+            touched = np.unique(np.concatenate([a, b])).tolist()
+            partners = db.execute(
+                select(ProductPairCount.product_id).where(ProductPairCount.other_product_id.in_(touched))
+                .union(select(ProductPairCount.other_product_id).where(ProductPairCount.product_id.in_(touched)))
+            ).scalars().all()
+            affected = sorted(set(touched) | set(partners))
+
+            report["recommendations"] = _rescore(db, affected, state.orders_processed, metric, top_n, min_support)
+            report.update(orders_folded=folded, pairs_updated=len(counts), products_rescored=len(affected))
+        state.last_order_id = high_water
+
+    db.commit()
+    report.update(last_order_id=state.last_order_id, seconds=round(time.perf_counter() - started, 3))
+    return report
@@ -0,0 +1,20 @@
+from fastapi import Response
+from pydantic import TypeAdapter
+
+_adapters: dict = {}
+
+
+def dump_json(schema_type, data) -> bytes:
+    """Serialize ORM objects (or dicts of them) to JSON bytes through the given response schema."""
+    adapter = _adapters.get(schema_type)
+    if adapter is None:
+        adapter = _adapters[schema_type] = TypeAdapter(schema_type)
+    return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+
+
+def json_response(schema_type, data, headers: dict | None = None) -> Response:
+    """
+    Response serialized by dump_json. Returning it from a route skips FastAPI's own
+    response_model pass (validate, jsonable_encoder, json.dumps); response_model stays for the docs.
+    """
+    return Response(content=dump_json(schema_type, data), media_type="application/json", headers=headers)
@@ -1,11 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime
+import io
+from typing import List, Optional, Union
 
 from database import get_db
 from auth import get_current_admin
 from models import Admin
 import crud, schemas
+from cache import catalog_cache
+from responses import json_response
+from product_export import EXPORT_MEDIA_TYPES, export_products
+from product_import import DEFAULT_CHUNK_SIZE, import_products
+from recommendations import build_recommendations
+from suggest import suggest_index
 
 router = APIRouter()
 
@@ -68,14 +77,42 @@ def admin_delete_category(
 
 
 # Products (admin-only)
-@router.get("/products/", response_model=List[schemas.Product])
+@router.get("/products/", response_model=Union[List[schemas.Product], schemas.ProductPage])
 def admin_list_products(
     skip: int = 0,
     limit: int = 100,
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_admin: Admin = Depends(get_current_admin),
 ):
-    return crud.get_products(db, skip=skip, limit=limit)
+    # Same modes as the public listing: keyset when `sort`/`cursor` is given, offset otherwise
+    if sort is None and cursor is None:
+        return json_response(List[schemas.Product], crud.get_products(db, skip=skip, limit=limit))
+
+    try:
+        products, next_cursor = crud.get_products_page(db, limit=limit, sort=sort or "newest", cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return json_response(schemas.ProductPage, {"items": products, "next_cursor": next_cursor})
+
+
+# Declared before /products/{product_id} so "export" is not taken for an id
+@router.get("/products/export")
+def admin_export_products(
+    format: str = "ndjson",
+    updated_since: Optional[datetime] = None,
+    current_admin: Admin = Depends(get_current_admin),
+):
+    try:
+        rows = export_products(format, updated_since=updated_since)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        rows,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="products.{format}"'},
+    )
 
 
 @router.get("/products/{product_id}", response_model=schemas.Product)
@@ -124,6 +161,71 @@ def admin_delete_product(
     return {"message": "Product deleted successfully"}
 
 
+@router.post("/products/recompute-ratings")
+def admin_recompute_ratings(
+    db: Session = Depends(get_db),
+    current_admin: Admin = Depends(get_current_admin),
+):
+    updated = crud.recompute_review_aggregates(db)
+    return {"message": "Review aggregates recomputed", "products_updated": updated}
+
+
+@router.post("/products/import", response_model=schemas.ProductImportReport)
+def admin_import_products(
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    db: Session = Depends(get_db),
+    current_admin: Admin = Depends(get_current_admin),
+):
+    # CSV or NDJSON, upserted by sku; the format defaults from the file extension
+    if format is None:
+        filename = (file.filename or "").lower()
+        format = "ndjson" if filename.endswith((".ndjson", ".jsonl")) else "csv"
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return import_products(db, stream, format, chunk_size=chunk_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        stream.detach()
+
+
+# Recommendations (admin-only)
+@router.post("/recommendations/rebuild")
+def admin_rebuild_recommendations(
+    full: bool = False,
+    db: Session = Depends(get_db),
+    current_admin: Admin = Depends(get_current_admin),
+):
+    # Incremental by default: only orders placed since the last run are folded in
+    return build_recommendations(db, full=full)
+
+
+# Autocomplete index (admin-only)
+@router.get("/suggest/stats")
+def admin_suggest_stats(current_admin: Admin = Depends(get_current_admin)):
+    return suggest_index.stats()
+
+
+@router.post("/suggest/rebuild")
+def admin_rebuild_suggest(current_admin: Admin = Depends(get_current_admin)):
+    suggest_index.mark_stale()
+    return {"message": "Autocomplete index will be rebuilt on the next lookup"}
+
+
+# Catalog cache (admin-only)
+@router.get("/cache/stats")
+def admin_cache_stats(current_admin: Admin = Depends(get_current_admin)):
+    return catalog_cache.stats()
+
+
+@router.post("/cache/clear")
+def admin_clear_cache(current_admin: Admin = Depends(get_current_admin)):
+    catalog_cache.clear()
+    return {"message": "Cache cleared"}
+
+
 # Users (admin-only, list only; admin users are excluded from list)
 @router.get("/users/", response_model=List[schemas.User])
 def admin_list_users(
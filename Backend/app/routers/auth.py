@@ -11,7 +11,7 @@ from auth import (
     get_current_active_user, get_current_admin, create_refresh_token_record,
     revoke_refresh_token, verify_token
 )
-import crud
+import crud, guest_cart
 from models import RefreshToken
 from schemas import (
     User, UserCreate, Token, LoginRequest, RefreshTokenInfo, Admin
@@ -79,6 +79,17 @@ def login(
         max_age=30 * 24 * 60 * 60  # 30 days
     )
 
+    # Merge the guest cart (if any) into the user's cart in one upsert, then drop it.
+    # A cart that can't be merged is dropped too: it must not block logging in.
+    guest_cart_id = guest_cart.unsign(request.cookies.get(guest_cart.GUEST_CART_COOKIE))
+    if guest_cart_id is not None:
+        try:
+            crud.merge_guest_cart(db, user.id, guest_cart.get_lines(guest_cart_id))
+        except ValueError:
+            pass
+        guest_cart.discard(guest_cart_id)
+        response.delete_cookie(guest_cart.GUEST_CART_COOKIE)
+
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/admin/login", response_model=Token)
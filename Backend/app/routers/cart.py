@@ -1,72 +1,120 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from typing import Optional, Union
 
-from database import get_db
-import crud, schemas
+from database import get_db, get_async_db
+import async_crud, crud, schemas
 from auth import get_current_active_user
 from models import User
+from responses import json_response
 
 
 router = APIRouter()
 
 
-@router.get("/cart/", response_model=schemas.Cart)
-def read_cart(
-    db: Session = Depends(get_db),
+def _cart_schema(view: Optional[str]):
+    if view is None:
+        return schemas.CartItemState
+    if view not in crud.CART_VIEWS:
+        raise HTTPException(status_code=400, detail=f"Unsupported cart view: {view}")
+    return schemas.CartSummary if view == "compact" else schemas.Cart
+
+
+# Mutations return only the changed line unless ?view=full|compact asks for the whole cart
+CartMutationResult = Union[schemas.CartItemState, schemas.Cart, schemas.CartSummary]
+
+
+# view=compact returns schemas.CartSummary: slim lines and server-computed totals
+@router.get("/cart/", response_model=Union[schemas.Cart, schemas.CartSummary])
+async def read_cart(
+    view: str = "full",
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user),
 ):
-    return crud.get_cart(db=db, user_id=current_user.id)
+    schema = _cart_schema(view)
+    if view == "compact":
+        return json_response(schema, await async_crud.get_cart_summary(db=db, user_id=current_user.id))
+    return json_response(schema, await async_crud.get_cart(db=db, user_id=current_user.id))
 
 
-@router.post("/cart/items/", response_model=schemas.Cart)
+@router.post("/cart/items/", response_model=CartMutationResult)
 def add_item_to_cart(
     item: schemas.CartItemCreate,
+    view: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
+    schema = _cart_schema(view)
     try:
-        return crud.add_to_cart(
+        cart = crud.add_to_cart(
             db=db,
             user_id=current_user.id,
             product_id=item.product_id,
             quantity=item.quantity,
+            view=view,
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    return json_response(schema, cart)
 
 
-@router.put("/cart/items/{product_id}", response_model=schemas.Cart)
+@router.put("/cart/items/{product_id}", response_model=CartMutationResult)
 def update_cart_item(
     product_id: int,
     item: schemas.CartItemUpdate,
+    view: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
+    schema = _cart_schema(view)
     try:
-        return crud.set_cart_item_quantity(
+        cart = crud.set_cart_item_quantity(
             db=db,
             user_id=current_user.id,
             product_id=product_id,
             quantity=item.quantity,
+            view=view,
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    return json_response(schema, cart)
 
 
-@router.delete("/cart/items/{product_id}", response_model=schemas.Cart)
+@router.delete("/cart/items/{product_id}", response_model=CartMutationResult)
 def remove_cart_item(
     product_id: int,
+    view: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
+    schema = _cart_schema(view)
     try:
-        return crud.remove_from_cart(
+        cart = crud.remove_from_cart(
             db=db,
             user_id=current_user.id,
             product_id=product_id,
+            view=view,
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    return json_response(schema, cart)
+
+
+@router.post("/cart/batch", response_model=Union[schemas.Cart, schemas.CartSummary])
+def apply_cart_batch(
+    batch: schemas.CartBatch,
+    view: str = "full",
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Apply several add/set/remove operations atomically and return the resulting cart once."""
+    schema = _cart_schema(view)
+    try:
+        cart = crud.apply_cart_batch(db=db, user_id=current_user.id, operations=batch.operations, view=view)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return json_response(schema, cart)
 
 
 @router.delete("/cart/")
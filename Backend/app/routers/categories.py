@@ -1,18 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
-from database import get_db
+from typing import List, Union
+from database import SessionLocal, get_db, get_read_db
 import crud, schemas
+from cache import catalog_cache
+from responses import dump_json
+from conditional import compute_validators, is_not_modified, not_modified_response, validator_headers
 
 router = APIRouter()
 
-@router.get("/categories/", response_model=List[schemas.Category])
-def read_categories(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    categories = crud.get_categories(db, skip=skip, limit=limit)
-    return categories
+@router.get("/categories/", response_model=Union[List[schemas.Category], List[schemas.CategoryWithStats]])
+def read_categories(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    include_stats: bool = False,
+    db: Session = Depends(get_read_db),
+):
+    if include_stats:
+        # Stats move with every product write, so the validators come from the cached rollup itself.
+        # The key has no version, so misses are filled from the primary rather than a lagging replica.
+        def load_stats():
+            with SessionLocal() as primary:
+                return dump_json(
+                    List[schemas.CategoryWithStats], crud.get_categories_with_stats(primary, skip=skip, limit=limit)
+                )
+
+        body = catalog_cache.get_or_set(("category_stats", skip, limit), load_stats)
+        etag, last_modified = compute_validators([(body,)])
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        return Response(content=body, media_type="application/json", headers=validator_headers(etag, last_modified))
+
+    # ETag only, as for product listings: a deleted category doesn't move the newest timestamp
+    etag, _ = compute_validators(crud.get_categories_versions(db, skip=skip, limit=limit))
+    last_modified = None
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+
+    body = catalog_cache.get_or_set(
+        ("categories", skip, limit, etag),
+        lambda: dump_json(List[schemas.Category], crud.get_categories(db, skip=skip, limit=limit)),
+    )
+    return Response(content=body, media_type="application/json", headers=validator_headers(etag, last_modified))
 
 @router.get("/categories/{category_id}", response_model=schemas.Category)
-def read_category(category_id: int, db: Session = Depends(get_db)):
+def read_category(category_id: int, db: Session = Depends(get_read_db)):
     db_category = crud.get_category(db, category_id=category_id)
     if db_category is None:
         raise HTTPException(status_code=404, detail="Category not found")
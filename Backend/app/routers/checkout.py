@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from database import get_db
+import crud, idempotency, schemas
+from auth import get_current_active_user
+from models import User
+from responses import json_response
+from routers.orders import ALLOWED_PAYMENT_METHODS
+
+
+router = APIRouter()
+
+
+@router.post("/checkout", response_model=schemas.Order)
+def checkout(
+    payload: schemas.CheckoutRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    idempotency_key: Optional[str] = Header(None),
+):
+    """Place an order for everything in the cart and empty it, in one transaction."""
+    if payload.payment_method not in ALLOWED_PAYMENT_METHODS:
+        raise HTTPException(status_code=400, detail="Unsupported payment method")
+
+    def place_order():
+        try:
+            db_order = crud.checkout_cart(
+                db=db,
+                user_id=current_user.id,
+                shipping_address=payload.shipping_address,
+                payment_method=payload.payment_method,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return json_response(schemas.Order, db_order)
+
+    return idempotency.run(idempotency_key, current_user.id, "POST /checkout", payload, place_order)
@@ -0,0 +1,85 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.orm import Session
+
+from database import get_db
+import crud, guest_cart, schemas
+from responses import json_response
+
+
+router = APIRouter()
+
+# Cart for visitors who are not logged in; nothing here writes to the database.
+# Every route answers with schemas.CartSummary (line ids are product ids).
+
+
+def _guest_cart_id(request: Request) -> str | None:
+    return guest_cart.unsign(request.cookies.get(guest_cart.GUEST_CART_COOKIE))
+
+
+def _summary(db: Session, cart_id: str | None, lines: dict | None = None) -> Response:
+    if lines is None:
+        lines = guest_cart.get_lines(cart_id)
+    response = json_response(schemas.CartSummary, crud.get_guest_cart_summary(db, lines))
+    if cart_id is not None:
+        # Re-sent on every response, so the cookie expires with the cart
+        response.set_cookie(
+            key=guest_cart.GUEST_CART_COOKIE,
+            value=guest_cart.sign(cart_id),
+            httponly=True,
+            secure=False,  # Set to True in production with HTTPS
+            samesite="lax",
+            max_age=guest_cart.GUEST_CART_TTL_SECONDS,
+        )
+    return response
+
+
+@router.get("/guest-cart/", response_model=schemas.CartSummary)
+def read_guest_cart(request: Request, db: Session = Depends(get_db)):
+    return _summary(db, _guest_cart_id(request))
+
+
+@router.post("/guest-cart/items/", response_model=schemas.CartSummary)
+def add_item_to_guest_cart(item: schemas.CartItemCreate, request: Request, db: Session = Depends(get_db)):
+    if item.quantity <= 0:
+        raise HTTPException(status_code=400, detail="Quantity must be greater than 0")
+    if item.product_id not in crud.existing_product_ids(db, [item.product_id]):
+        raise HTTPException(status_code=400, detail="Product not found")
+
+    cart_id = _guest_cart_id(request) or guest_cart.new_cart_id()
+    try:
+        lines = guest_cart.update_line(cart_id, item.product_id, item.quantity, increment=True)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _summary(db, cart_id, lines)
+
+
+@router.put("/guest-cart/items/{product_id}", response_model=schemas.CartSummary)
+def update_guest_cart_item(
+    product_id: int, item: schemas.CartItemUpdate, request: Request, db: Session = Depends(get_db)
+):
+    cart_id = _guest_cart_id(request)
+    if product_id not in guest_cart.get_lines(cart_id):
+        raise HTTPException(status_code=400, detail="Cart item not found")
+    try:
+        lines = guest_cart.update_line(cart_id, product_id, item.quantity, increment=False)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _summary(db, cart_id, lines)
+
+
+@router.delete("/guest-cart/items/{product_id}", response_model=schemas.CartSummary)
+def remove_guest_cart_item(product_id: int, request: Request, db: Session = Depends(get_db)):
+    cart_id = _guest_cart_id(request)
+    if product_id not in guest_cart.get_lines(cart_id):
+        raise HTTPException(status_code=400, detail="Cart item not found")
+    lines = guest_cart.update_line(cart_id, product_id, 0, increment=False)
+    return _summary(db, cart_id, lines)
+
+
+@router.delete("/guest-cart/")
+def clear_guest_cart(request: Request, response: Response):
+    cart_id = _guest_cart_id(request)
+    if cart_id is not None:
+        guest_cart.discard(cart_id)
+    response.delete_cookie(guest_cart.GUEST_CART_COOKIE)
+    return {"message": "Guest cart cleared"}
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from database import get_db
-import crud, schemas
+from database import get_db, get_async_db, get_async_read_db
+import async_crud, crud, idempotency, schemas
 from auth import get_current_active_user, get_current_admin
 from models import User, Admin
+from responses import json_response
 
 
 router = APIRouter()
@@ -17,40 +19,49 @@ def create_order(
     order: schemas.OrderCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
+    idempotency_key: Optional[str] = Header(None),
 ):
     if not order.order_items or len(order.order_items) == 0:
         raise HTTPException(status_code=400, detail="Order must contain at least one item")
     if order.payment_method not in ALLOWED_PAYMENT_METHODS:
         raise HTTPException(status_code=400, detail="Unsupported payment method")
 
-    try:
-        return crud.create_order(db=db, user_id=current_user.id, order=order)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    def place_order():
+        try:
+            db_order = crud.create_order(db=db, user_id=current_user.id, order=order)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return json_response(schemas.Order, db_order)
 
+    # Retries with the same Idempotency-Key get the first order back instead of a new one
+    return idempotency.run(idempotency_key, current_user.id, "POST /orders/", order, place_order)
 
+
+# Order history may lag slightly behind on a replica; the order detail below stays on the primary
+# so it can be read right after checkout/payment.
 @router.get("/orders/", response_model=List[schemas.Order])
-def read_my_orders(
+async def read_my_orders(
     skip: int = 0,
     limit: int = 10,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_active_user),
 ):
-    return crud.get_orders_by_user(db=db, user_id=current_user.id, skip=skip, limit=limit)
+    orders = await async_crud.get_orders_by_user(db=db, user_id=current_user.id, skip=skip, limit=limit)
+    return json_response(List[schemas.Order], orders)
 
 
 @router.get("/orders/{order_id}", response_model=schemas.Order)
-def read_order(
+async def read_order(
     order_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user),
 ):
-    db_order = crud.get_order(db=db, order_id=order_id)
+    db_order = await async_crud.get_order(db=db, order_id=order_id)
     if db_order is None:
         raise HTTPException(status_code=404, detail="Order not found")
     if db_order.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to access this order")
-    return db_order
+    return json_response(schemas.Order, db_order)
 
 
 # Admin endpoints
@@ -61,7 +72,7 @@ def admin_read_orders(
     db: Session = Depends(get_db),
     _: Admin = Depends(get_current_admin),
 ):
-    return crud.get_all_orders(db=db, skip=skip, limit=limit)
+    return json_response(List[schemas.Order], crud.get_all_orders(db=db, skip=skip, limit=limit))
 
 
 @router.put("/admin/orders/{order_id}", response_model=schemas.Order)
@@ -71,8 +82,11 @@ def admin_update_order(
     db: Session = Depends(get_db),
     _: Admin = Depends(get_current_admin),
 ):
-    db_order = crud.update_order_status(db=db, order_id=order_id, order_update=order_update)
+    try:
+        db_order = crud.update_order_status(db=db, order_id=order_id, order_update=order_update)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     if db_order is None:
         raise HTTPException(status_code=404, detail="Order not found")
-    return db_order
+    return json_response(schemas.Order, db_order)
 
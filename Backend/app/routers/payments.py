@@ -1,13 +1,14 @@
 import os
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from database import get_db
 from auth import get_current_active_user
 from models import User
-import crud, schemas
+import crud, idempotency, schemas
 
 try:
     import razorpay
@@ -55,7 +56,19 @@ def create_razorpay_order(
     payload: RazorpayCreateOrderRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
+    idempotency_key: Optional[str] = Header(None),
 ):
+    # A retried request with the same Idempotency-Key gets the same Razorpay order back
+    return idempotency.run(
+        idempotency_key,
+        current_user.id,
+        "POST /payments/razorpay/order",
+        payload,
+        lambda: JSONResponse(_create_razorpay_order(payload, db, current_user)),
+    )
+
+
+def _create_razorpay_order(payload: RazorpayCreateOrderRequest, db: Session, current_user: User) -> dict:
     db_order = crud.get_order(db=db, order_id=payload.order_id)
     if not db_order:
         raise HTTPException(status_code=404, detail="Order not found")
@@ -65,11 +78,17 @@ def create_razorpay_order(
     if db_order.payment_method != "razorpay":
         raise HTTPException(status_code=400, detail="Order payment method is not razorpay")
 
-    if db_order.payment_status == "paid":
+    if db_order.payment_status in ("paid", "refund_pending"):
         raise HTTPException(status_code=400, detail="Order is already paid")
 
     client, key_id = _get_razorpay_client()
 
+    # A failed attempt released the stock; take it again before the retry is charged
+    try:
+        crud.reserve_order_stock(db=db, order_id=db_order.id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
     # Razorpay expects amount in the smallest currency unit (paise)
     amount_paise = int(round(float(db_order.total_amount) * 100))
     if amount_paise <= 0:
@@ -138,12 +157,16 @@ def verify_razorpay_payment(
         razorpay_signature=payload.razorpay_signature,
     )
 
-    # Mark internal order as paid
-    updated = crud.update_order_status(
-        db=db,
-        order_id=db_order.id,
-        order_update=schemas.OrderUpdate(status="processing", payment_status="paid"),
-    )
+    # Mark internal order as paid; this takes the stock again if a failed attempt released it
+    try:
+        updated = crud.update_order_status(
+            db=db,
+            order_id=db_order.id,
+            order_update=schemas.OrderUpdate(status="processing", payment_status="paid"),
+        )
+    except ValueError as e:
+        crud.flag_order_for_refund(db=db, order_id=db_order.id)
+        raise HTTPException(status_code=409, detail=f"{e}. The payment was received and will be refunded")
 
     return {
         "message": "Payment verified",
@@ -1,22 +1,169 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from database import get_db
-import crud, models, schemas
+from typing import List, Optional, Union
+from database import get_db, get_read_db, get_async_read_db
+import async_crud, crud, models, schemas
+from cache import catalog_cache
+from responses import dump_json
+from conditional import compute_validators, is_not_modified, not_modified_response, validator_headers
 
 router = APIRouter()
 
-@router.get("/products/", response_model=List[schemas.Product])
-def read_products(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    products = crud.get_products(db, skip=skip, limit=limit)
-    return products
+@router.get("/products/", response_model=Union[List[schemas.Product], schemas.ProductPage])
+async def read_products(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    # Passing `sort` or `cursor` switches to keyset pagination; plain skip/limit keeps the offset mode
+    if sort is None and cursor is None:
+        versions = await async_crud.get_products_versions(db, skip=skip, limit=limit)
+        key = ("products", "offset", skip, limit)
+    else:
+        sort = sort or "newest"
+        try:
+            versions = await async_crud.get_products_page_versions(db, limit=limit, sort=sort, cursor=cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        key = ("products", "keyset", sort, cursor, limit)
+
+    # Collections are validated by ETag only: removing a row changes it, but not the newest timestamp
+    etag, _ = compute_validators(versions)
+    last_modified = None
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+
+    key += (etag,)
+    body = catalog_cache.get(key)
+    if body is None:
+        if key[1] == "offset":
+            products = await async_crud.get_products(db, skip=skip, limit=limit)
+            body = dump_json(List[schemas.Product], products)
+        else:
+            products, next_cursor = await async_crud.get_products_page(db, limit=limit, sort=sort, cursor=cursor)
+            body = dump_json(schemas.ProductPage, {"items": products, "next_cursor": next_cursor})
+        catalog_cache.set(key, body)
+    return Response(content=body, media_type="application/json", headers=validator_headers(etag, last_modified))
+
+@router.get(
+    "/products/summary",
+    response_model=Union[List[schemas.ProductSummary], schemas.ProductSummaryPage],
+    response_model_exclude_unset=True,
+)
+def read_product_summaries(
+    skip: int = 0,
+    limit: int = 100,
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+):
+    # Column-only projection for grid pages: no reviews, images or JSON blobs are loaded
+    try:
+        selected = crud.parse_summary_fields(fields)
+        if sort is None and cursor is None:
+            return crud.get_product_summaries(db, fields=selected, skip=skip, limit=limit)
+        items, next_cursor = crud.get_product_summaries_page(
+            db, fields=selected, limit=limit, sort=sort or "newest", cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/products/filter", response_model=schemas.ProductFilterPage, response_model_exclude_unset=True)
+def filter_products(
+    category_id: Optional[List[int]] = Query(None),
+    brand: Optional[List[str]] = Query(None),
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_rating: Optional[float] = None,
+    availability_status: Optional[str] = None,
+    limit: int = 20,
+    sort: str = "newest",
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+):
+    filters = schemas.ProductFilter(
+        category_ids=category_id or [],
+        brands=brand or [],
+        min_price=min_price,
+        max_price=max_price,
+        min_rating=min_rating,
+        availability_status=availability_status,
+    )
+    try:
+        selected = crud.parse_summary_fields(fields)
+        items, next_cursor = crud.filter_products(
+            db, filters, fields=selected, limit=limit, sort=sort, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor, "facets": crud.get_product_facets(db, filters)}
+
+@router.get("/products/search", response_model=schemas.ProductSummaryPage, response_model_exclude_unset=True)
+def search_products(
+    q: str,
+    category_id: Optional[int] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+):
+    try:
+        selected = crud.parse_summary_fields(fields)
+        items, next_cursor = crud.search_products(
+            db, q=q, fields=selected, category_id=category_id, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/products/suggest", response_model=List[schemas.Suggestion])
+def suggest_products(prefix: str, limit: int = 10):
+    # Served from the in-memory prefix index; the database is only read when it (re)builds
+    try:
+        return crud.get_suggestions(prefix=prefix, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/products/{product_id}", response_model=schemas.Product)
-def read_product(product_id: int, db: Session = Depends(get_db)):
-    db_product = crud.get_product(db, product_id=product_id)
-    if db_product is None:
+async def read_product(product_id: int, request: Request, db: AsyncSession = Depends(get_async_read_db)):
+    version = await async_crud.get_product_version(db, product_id=product_id)
+    if version is None:
         raise HTTPException(status_code=404, detail="Product not found")
-    return db_product
+    etag, last_modified = compute_validators([version])
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+
+    key = ("product", product_id, etag)
+    body = catalog_cache.get(key)
+    if body is None:
+        db_product = await async_crud.get_product(db, product_id=product_id)
+        if db_product is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+        body = dump_json(schemas.Product, db_product)
+        catalog_cache.set(key, body)
+    return Response(content=body, media_type="application/json", headers=validator_headers(etag, last_modified))
+
+@router.get("/products/{product_id}/related", response_model=List[schemas.RelatedProduct], response_model_exclude_unset=True)
+def read_related_products(
+    product_id: int,
+    limit: int = 10,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+):
+    if crud.get_product_version(db, product_id=product_id) is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    try:
+        selected = crud.parse_summary_fields(fields)
+        return crud.get_related_products(db, product_id=product_id, fields=selected, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/products/", response_model=schemas.Product)
 def create_product(product: schemas.ProductCreate, db: Session = Depends(get_db)):
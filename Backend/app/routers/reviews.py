@@ -1,26 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
-from database import get_db
+from typing import Optional
+from database import get_db, get_read_db
 import crud, schemas
+from conditional import compute_validators, is_not_modified, not_modified_response, validator_headers
 
 router = APIRouter()
 
-@router.get("/products/{product_id}/reviews/", response_model=List[schemas.Review])
-def read_reviews_by_product(product_id: int, db: Session = Depends(get_db)):
-    # Check if product exists
-    db_product = crud.get_product(db, product_id=product_id)
-    if db_product is None:
+@router.get("/products/{product_id}/reviews/", response_model=schemas.ReviewPage)
+def read_reviews_by_product(
+    product_id: int,
+    request: Request,
+    response: Response,
+    sort: str = "newest",
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+):
+    # One product-row read: existence check, aggregate summary and validator
+    # (review writes bump the product's version)
+    summary = crud.get_review_summary(db, product_id=product_id)
+    if summary is None:
         raise HTTPException(status_code=404, detail="Product not found")
+    etag, last_modified = compute_validators([(summary.id, summary.created_at, summary.updated_at)])
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
 
-    reviews = crud.get_reviews_by_product(db, product_id=product_id)
-    return reviews
+    try:
+        reviews, next_cursor = crud.get_reviews_page(db, product_id=product_id, limit=limit, sort=sort, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    response.headers.update(validator_headers(etag, last_modified))
+    return {
+        "items": reviews,
+        "next_cursor": next_cursor,
+        "summary": {
+            "rating": summary.rating or 0.0,
+            "review_count": summary.review_count,
+            "rating_histogram": [getattr(summary, f"rating_{stars}_count") for stars in range(1, 6)],
+        },
+    }
 
 @router.post("/products/{product_id}/reviews/", response_model=schemas.Review)
 def create_review(product_id: int, review: schemas.ReviewCreate, db: Session = Depends(get_db)):
-    # Check if product exists
-    db_product = crud.get_product(db, product_id=product_id)
-    if db_product is None:
+    # Check if product exists (product row only, no relationships)
+    if crud.get_review_summary(db, product_id=product_id) is None:
         raise HTTPException(status_code=404, detail="Product not found")
 
     return crud.create_review(db=db, product_id=product_id, review=review)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, Field
+from typing import Optional, List, Union
 from datetime import datetime
 
 # Category Schemas
@@ -21,9 +21,16 @@ class Category(CategoryBase):
     class Config:
         from_attributes = True
 
+# Category with product rollups (GET /categories/?include_stats=true)
+class CategoryWithStats(Category):
+    product_count: int = 0
+    in_stock_count: int = 0
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+
 # Review Schemas
 class ReviewBase(BaseModel):
-    rating: int
+    rating: int = Field(ge=1, le=5)
     comment: Optional[str] = None
     reviewer_name: str
     reviewer_email: str
@@ -42,6 +49,16 @@ class Review(ReviewBase):
     class Config:
         from_attributes = True
 
+class ReviewSummary(BaseModel):
+    rating: float = 0.0
+    review_count: int = 0
+    rating_histogram: List[int] = []  # review counts for 1..5 stars
+
+class ReviewPage(BaseModel):
+    items: List[Review] = []
+    next_cursor: Optional[str] = None
+    summary: ReviewSummary
+
 # Product Schemas
 class ProductBase(BaseModel):
     name: str
@@ -72,6 +89,8 @@ class ProductUpdate(ProductBase):
 class Product(ProductBase):
     id: int
     rating: float = 0.0
+    review_count: int = 0
+    rating_histogram: List[int] = []  # review counts for 1..5 stars
     category_rel: Optional[Category] = None
     reviews: List[Review] = []
     meta: Optional[dict] = None  # {"createdAt": str, "updatedAt": str, "barcode": str, "qrCode": str}
@@ -81,6 +100,83 @@ class Product(ProductBase):
     class Config:
         from_attributes = True
 
+class ProductPage(BaseModel):
+    items: List[Product] = []
+    next_cursor: Optional[str] = None
+
+# Autocomplete (see suggest.py); type is "product", "brand", "category" or "tag"
+class Suggestion(BaseModel):
+    type: str
+    label: str
+    product_id: Optional[int] = None  # set for products
+    count: Optional[int] = None  # number of products, for brands/categories/tags
+
+# Bulk import (see product_import.py)
+class ProductImportError(BaseModel):
+    row: int
+    sku: Optional[str] = None
+    error: str
+
+class ProductImportReport(BaseModel):
+    received: int
+    inserted: int
+    updated: int
+    failed: int
+    errors: List[ProductImportError] = []  # capped at product_import.MAX_REPORTED_ERRORS
+
+# Slim projection for grids/list pages; only the fields requested via `fields=` are set
+class ProductSummary(BaseModel):
+    id: int
+    name: Optional[str] = None
+    price: Optional[float] = None
+    discount_percentage: Optional[float] = None
+    rating: Optional[float] = None
+    review_count: Optional[int] = None
+    thumbnail: Optional[str] = None
+    availability_status: Optional[str] = None
+    in_stock: Optional[bool] = None
+    category_name: Optional[str] = None
+    category_id: Optional[int] = None
+    brand: Optional[str] = None
+    description: Optional[str] = None
+    sku: Optional[str] = None
+    stock_quantity: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+class RelatedProduct(ProductSummary):
+    score: float  # cosine or lift, see recommendations.py
+
+class ProductSummaryPage(BaseModel):
+    items: List[ProductSummary] = []
+    next_cursor: Optional[str] = None
+
+# Faceted filtering
+class ProductFilter(BaseModel):
+    category_ids: List[int] = []
+    brands: List[str] = []
+    min_price: Optional[float] = None  # compared against the discounted price
+    max_price: Optional[float] = None
+    min_rating: Optional[float] = None
+    availability_status: Optional[str] = None
+
+class FacetCount(BaseModel):
+    value: Union[int, str, None] = None
+    label: Optional[str] = None
+    count: int
+    min: Optional[float] = None  # price buckets only
+    max: Optional[float] = None
+
+class ProductFacets(BaseModel):
+    brand: List[FacetCount] = []
+    category: List[FacetCount] = []
+    rating: List[FacetCount] = []
+    price: List[FacetCount] = []
+
+class ProductFilterPage(BaseModel):
+    items: List[ProductSummary] = []
+    next_cursor: Optional[str] = None
+    facets: ProductFacets
+
 # Authentication Schemas
 class UserBase(BaseModel):
     email: EmailStr
@@ -191,6 +287,10 @@ class OrderBase(BaseModel):
 class OrderCreate(OrderBase):
     order_items: List[OrderItemCreate]
 
+# POST /checkout: the items come from the user's cart
+class CheckoutRequest(OrderBase):
+    pass
+
 class OrderUpdate(BaseModel):
     status: Optional[str] = None
     payment_status: Optional[str] = None
@@ -229,6 +329,20 @@ class CartItem(CartItemBase):
     class Config:
         from_attributes = True
 
+# POST /cart/batch: operations apply in order, all or nothing
+class CartOperation(BaseModel):
+    op: str  # add, set, remove
+    product_id: int
+    quantity: int = 1  # ignored for remove; set with 0 removes the line
+
+class CartBatch(BaseModel):
+    operations: List[CartOperation] = Field(min_length=1, max_length=100)
+
+# Result of a cart mutation when no ?view= is requested; quantity 0 means the line was removed
+class CartItemState(CartItemBase):
+    id: int
+    cart_id: int
+
 class Cart(BaseModel):
     id: int
     user_id: int
@@ -239,6 +353,25 @@ class Cart(BaseModel):
     class Config:
         from_attributes = True
 
+# Compact cart (?view=compact): product columns only, totals computed by the server
+class CartLine(BaseModel):
+    id: int
+    product_id: int
+    name: str
+    thumbnail: Optional[str] = None
+    unit_price: float
+    discount_percentage: float = 0.0
+    quantity: int
+    line_total: float  # after discount
+    in_stock: bool
+
+class CartSummary(BaseModel):
+    items: List[CartLine] = []
+    item_count: int = 0
+    subtotal: float = 0.0
+    discount: float = 0.0
+    total: float = 0.0
+
 # Payments Schemas
 class PaymentTransactionBase(BaseModel):
     provider: str
@@ -0,0 +1,258 @@
+import math
+import os
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from heapq import nlargest
+from typing import Callable, Iterable
+
+_WORD_RE = re.compile(r"\w+")
+# Lookups matching more keys than this are memoized until the index next changes
+MEMO_MIN_MATCHES = 2000
+MEMO_MAX_ENTRIES = 1024
+
+
+def normalize(text: str) -> str:
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+
+def _word_suffixes(text: str) -> list[str]:
+    """Keys for matching a prefix at any word start: "usb c hub" -> ["usb c hub", "c hub", "hub"]."""
+    words = normalize(text).split()
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+def popularity(rating, review_count) -> float:
+    return (1.0 + (rating or 0.0)) * (1.0 + math.log1p(review_count or 0))
+
+
+class _Entry:
+    __slots__ = ("kind", "label", "product_id", "weight", "count")
+
+    def __init__(self, kind: str, label: str, product_id: int | None, weight: float):
+        self.kind = kind
+        self.label = label
+        self.product_id = product_id
+        self.weight = weight
+        self.count = 0  # products contributing to a brand/category/tag entry
+
+
+class SuggestIndex:
+    """
+    In-memory prefix index for search-as-you-type.
+    Keys live in one sorted list (with a parallel list of entries), so a prefix lookup is a
+    bisect plus a scan of the matching range. Product names, brands, categories and tags are
+    indexed at every word start; brand/category/tag entries weigh the sum of their products.
+
+    crud.py keeps it current with upsert()/remove() after commits. Other worker processes
+    only pick changes up on their periodic rebuild, every `rebuild_seconds`. Rebuilds after
+    the first run in the background; the current index serves lookups until the new one
+    is swapped in.
+    """
+
+    def __init__(self, rebuild_seconds: float = 600.0):
+        self.rebuild_seconds = rebuild_seconds
+        self._keys: list[str] = []
+        self._entries: list[_Entry] = []
+        self._products: dict[int, tuple[_Entry, list[tuple[str, str]]]] = {}
+        self._terms: dict[tuple[str, str], _Entry] = {}
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._memo: dict[tuple[str, int], list[dict]] = {}
+        self._built_at: float | None = None
+        self._stale = True
+        self._generation = 0  # bumped by mark_stale()
+        self._pending: list | None = None  # upserts/removes made while a build runs
+        self._retry_at = 0.0
+        self.build_seconds = 0.0
+
+    # Maintenance
+    def needs_rebuild(self) -> bool:
+        with self._lock:
+            return self._stale or self._built_at is None or time.monotonic() - self._built_at > self.rebuild_seconds
+
+    def ensure_built(self, loader: Callable[[], Iterable]):
+        """
+        Rebuild from loader() when stale or older than rebuild_seconds. Only the first build
+        blocks (concurrent callers wait for it); later ones start a background thread and
+        return at once. loader must open its own session, as it may run on that thread.
+        """
+        if not self.needs_rebuild() or time.monotonic() < self._retry_at:
+            return
+        if self._built_at is None:
+            with self._build_lock:
+                if self._built_at is None:
+                    self.build(loader())
+            return
+        if self._build_lock.acquire(blocking=False):
+            threading.Thread(target=self._rebuild, args=(loader,), name="suggest-rebuild", daemon=True).start()
+
+    def _rebuild(self, loader: Callable[[], Iterable]):
+        try:
+            self.build(loader())
+        except Exception:
+            # Keep serving the current index; don't retry on every lookup
+            self._retry_at = time.monotonic() + min(self.rebuild_seconds, 30.0)
+            raise
+        finally:
+            self._build_lock.release()
+
+    def mark_stale(self):
+        """Force a full rebuild on the next lookup (bulk changes, category renames)."""
+        with self._lock:
+            self._stale = True
+            self._generation += 1
+            self._memo.clear()
+
+    def build(self, rows):
+        """Rebuild from rows with id, name, brand, category_name, tags, rating and review_count."""
+        started = time.perf_counter()
+        with self._lock:
+            self._pending = []
+            generation = self._generation
+        try:
+            fresh = SuggestIndex(self.rebuild_seconds)
+            pairs = []
+            for row in rows:
+                pairs.extend(fresh._add(row, insert=False))
+            pairs.sort(key=lambda pair: pair[0])
+            keys = [key for key, _ in pairs]
+            entries = [entry for _, entry in pairs]
+            with self._lock:
+                self._keys = keys
+                self._entries = entries
+                self._products = fresh._products
+                self._terms = fresh._terms
+                # Changes committed while rows were being read may be missing from them
+                for product_id, row in self._pending:
+                    self._remove(product_id)
+                    if row is not None:
+                        self._add(row, insert=True)
+                self._memo.clear()
+                self._built_at = time.monotonic()
+                self._stale = self._generation != generation
+                self.build_seconds = time.perf_counter() - started
+        finally:
+            with self._lock:
+                self._pending = None
+
+    def upsert(self, row):
+        with self._lock:
+            self._remove(row.id)
+            self._add(row, insert=True)
+            if self._pending is not None:
+                self._pending.append((row.id, row))
+            self._memo.clear()
+
+    def remove(self, product_id: int):
+        with self._lock:
+            self._remove(product_id)
+            if self._pending is not None:
+                self._pending.append((product_id, None))
+            self._memo.clear()
+
+    def _insert(self, key: str, entry: _Entry):
+        i = bisect_right(self._keys, key)
+        self._keys.insert(i, key)
+        self._entries.insert(i, entry)
+
+    def _delete(self, key: str, entry: _Entry):
+        i = bisect_left(self._keys, key)
+        while i < len(self._keys) and self._keys[i] == key:
+            if self._entries[i] is entry:
+                del self._keys[i]
+                del self._entries[i]
+                return
+            i += 1
+
+    def _add(self, row, insert: bool) -> list[tuple[str, _Entry]]:
+        """Index one product. With insert=False the new (key, entry) pairs are returned for a bulk sort."""
+        weight = popularity(row.rating, row.review_count)
+        product_entry = _Entry("product", row.name, row.id, weight)
+        pairs = [(key, product_entry) for key in _word_suffixes(row.name or "")]
+
+        terms = []
+        for kind, label in (("brand", row.brand), ("category", row.category_name)):
+            if label:
+                terms.append((kind, label))
+        terms.extend(("tag", tag) for tag in dict.fromkeys(row.tags or []) if tag)
+        for kind, label in terms:
+            term = self._terms.get((kind, normalize(label)))
+            if term is None:
+                term = self._terms[(kind, normalize(label))] = _Entry(kind, label, None, 0.0)
+                pairs.extend((key, term) for key in _word_suffixes(label))
+            term.weight += weight
+            term.count += 1
+
+        self._products[row.id] = (product_entry, terms)
+        if insert:
+            for key, entry in pairs:
+                self._insert(key, entry)
+        return pairs
+
+    def _remove(self, product_id: int):
+        indexed = self._products.pop(product_id, None)
+        if indexed is None:
+            return
+        product_entry, terms = indexed
+        for key in _word_suffixes(product_entry.label or ""):
+            self._delete(key, product_entry)
+        for kind, label in terms:
+            term = self._terms[(kind, normalize(label))]
+            term.weight -= product_entry.weight
+            term.count -= 1
+            if term.count <= 0:
+                del self._terms[(kind, normalize(label))]
+                for key in _word_suffixes(term.label):
+                    self._delete(key, term)
+
+    # Lookups
+    def suggest(self, prefix: str, limit: int = 10) -> list[dict]:
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        with self._lock:
+            lo = bisect_left(self._keys, prefix)
+            # Every key starting with `prefix` sorts before prefix + U+10FFFF
+            hi = bisect_left(self._keys, prefix + "\U0010ffff", lo)
+            memoize = hi - lo >= MEMO_MIN_MATCHES
+            if memoize and (prefix, limit) in self._memo:
+                return self._memo[(prefix, limit)]
+
+            # One entry can match through several word starts
+            matches = {id(entry): entry for entry in self._entries[lo:hi]}
+            best = nlargest(limit, matches.values(), key=lambda entry: entry.weight)
+            suggestions = [
+                {"type": entry.kind, "label": entry.label, "product_id": entry.product_id, "count": entry.count or None}
+                for entry in best
+            ]
+            if memoize:
+                if len(self._memo) >= MEMO_MAX_ENTRIES:
+                    self._memo.clear()
+                self._memo[(prefix, limit)] = suggestions
+            return suggestions
+
+    def stats(self) -> dict:
+        with self._lock:
+            # Keys, entries and the bookkeeping dicts; label strings are shared with the rows they came from
+            approx_bytes = (
+                sys.getsizeof(self._keys) + sys.getsizeof(self._entries)
+                + sum(sys.getsizeof(key) for key in self._keys)
+                + sys.getsizeof(self._products) + sys.getsizeof(self._terms)
+                + sum(sys.getsizeof(entry) + sys.getsizeof(terms) for entry, terms in self._products.values())
+                + sum(sys.getsizeof(term) for term in self._terms.values())
+            )
+            return {
+                "keys": len(self._keys),
+                "products": len(self._products),
+                "terms": len(self._terms),
+                "approx_memory_bytes": approx_bytes,
+                "build_seconds": round(self.build_seconds, 4),
+                "age_seconds": round(time.monotonic() - self._built_at, 1) if self._built_at is not None else None,
+                "stale": self._stale,
+            }
+
+
+suggest_index = SuggestIndex(rebuild_seconds=float(os.getenv("SUGGEST_INDEX_REBUILD_SECONDS", "600")))
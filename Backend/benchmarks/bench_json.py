@@ -0,0 +1,134 @@
+"""
+Serialization benchmark for the largest list endpoints: FastAPI's response_model path
+(validate + jsonable_encoder + json.dumps) versus responses.dump_json (TypeAdapter, Rust encoder).
+
+Runs on transient ORM objects, no database needed:
+    cd Backend/app && python ../benchmarks/bench_json.py [--products 100] [--orders 10] [--repeat 20]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic import TypeAdapter
+
+import schemas
+from responses import dump_json
+from models import Category, Order, OrderItem, Product, Review, User
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def make_product(i: int, category: Category, reviews_per_product: int) -> Product:
+    now = datetime.now(timezone.utc)
+    product = Product(
+        id=i, name=f"Product {i}", description="Lorem ipsum dolor sit amet " * 8, category_id=category.id,
+        price=100.0 + i, discount_percentage=5.0, rating=4.2, review_count=reviews_per_product,
+        rating_1_count=0, rating_2_count=1, rating_3_count=2, rating_4_count=3, rating_5_count=4,
+        stock_quantity=10, tags=["beauty", "mascara"], brand="Acme", sku=f"SKU-{i}", weight=2.0,
+        dimensions={"width": 10.0, "height": 5.0, "depth": 2.0}, warranty_information="1 year",
+        shipping_information="Ships in 2 days", availability_status="In Stock", return_policy="30 days",
+        minimum_order_quantity=1, meta={"barcode": "123", "qrCode": "https://example.com/qr.png"},
+        images=[f"https://cdn.example.com/{i}/{n}.png" for n in range(3)],
+        thumbnail=f"https://cdn.example.com/{i}/thumb.png", created_at=now, updated_at=now,
+    )
+    product.category_rel = category
+    product.reviews = [
+        Review(id=i * 100 + n, product_id=i, rating=4, comment="Great product, would buy again",
+               date=now, reviewer_name="Jane Doe", reviewer_email="jane@example.com")
+        for n in range(reviews_per_product)
+    ]
+    return product
+
+
+def make_order(i: int, user: User, products: list) -> Order:
+    now = datetime.now(timezone.utc)
+    order = Order(
+        id=i, user_id=user.id, status="pending", total_amount=0.0, shipping_address="221B Baker Street",
+        payment_method="razorpay", payment_status="pending", created_at=now, updated_at=now,
+    )
+    order.user = user
+    order.order_items = [
+        OrderItem(id=i * 100 + n, order_id=i, product_id=p.id, quantity=2, price=p.price, subtotal=2 * p.price)
+        for n, p in enumerate(products)
+    ]
+    for item, product in zip(order.order_items, products):
+        item.product = product
+    return order
+
+
+_loop = asyncio.new_event_loop()
+_fields: dict = {}
+_adapters: dict = {}
+
+
+def fastapi_path(schema_type, data) -> bytes:
+    """What FastAPI does with a returned ORM object and a response_model (for an async route)."""
+    field = _fields.get(schema_type)
+    if field is None:
+        field = _fields[schema_type] = create_response_field(name="Response", type_=schema_type)
+    content = _loop.run_until_complete(serialize_response(field=field, response_content=data, is_coroutine=True))
+    return JSONResponse(content).body
+
+
+def orjson_path(schema_type, data) -> bytes:
+    adapter = _adapters.get(schema_type)
+    if adapter is None:
+        adapter = _adapters[schema_type] = TypeAdapter(schema_type)
+    return orjson.dumps(adapter.dump_python(adapter.validate_python(data, from_attributes=True), mode="json"))
+
+
+def bench(label: str, fn, repeat: int) -> float:
+    fn()  # warm up (TypeAdapter/field construction)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - started) / repeat * 1000
+    print(f"  {label:<32} {elapsed:8.2f} ms")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=100, help="products per /products/ page")
+    parser.add_argument("--reviews", type=int, default=5, help="reviews per product")
+    parser.add_argument("--orders", type=int, default=10, help="orders per /orders/ page")
+    parser.add_argument("--items", type=int, default=5, help="items per order")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    category = Category(id=1, name="Beauty", description="Beauty products",
+                        created_at=datetime.now(timezone.utc), updated_at=None)
+    products = [make_product(i, category, args.reviews) for i in range(1, args.products + 1)]
+    user = User(id=1, email="jane@example.com", username="jane", full_name="Jane Doe", is_active=True,
+                is_verified=True, created_at=datetime.now(timezone.utc), updated_at=None)
+    orders = [make_order(i, user, products[: args.items]) for i in range(1, args.orders + 1)]
+
+    cases = [
+        (f"/products/ ({args.products} products, {args.reviews} reviews each)", List[schemas.Product], products),
+        (f"/orders/ ({args.orders} orders, {args.items} items each)", List[schemas.Order], orders),
+    ]
+    for title, schema_type, data in cases:
+        assert json.loads(fastapi_path(schema_type, data)) == json.loads(dump_json(schema_type, data))
+        print(title)
+        before = bench("response_model + json.dumps", lambda: fastapi_path(schema_type, data), args.repeat)
+        after = bench("TypeAdapter.dump_json", lambda: dump_json(schema_type, data), args.repeat)
+        if orjson is not None:
+            bench("TypeAdapter + orjson", lambda: orjson_path(schema_type, data), args.repeat)
+        print(f"  speedup {before / after:.1f}x\n")
+
+
+if __name__ == "__main__":
+    main()
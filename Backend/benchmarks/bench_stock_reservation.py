@@ -0,0 +1,142 @@
+"""
+Flash-sale benchmark: N concurrent buyers of one SKU with limited stock.
+
+Compares crud.create_order (one conditional UPDATE, row lock held only for the commit)
+with the same flow doing read-check-write under SELECT ... FOR UPDATE.
+Both must sell exactly the available stock; the benchmark checks there is no oversell.
+
+Needs a database (DATABASE_URL); creates and removes its own user and product:
+    cd Backend/app && python ../benchmarks/bench_stock_reservation.py [--buyers 1000] [--stock 100] [--workers 50] [--rtt-ms 1]
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import joinedload, sessionmaker
+
+import crud
+import schemas
+from database import DATABASE_URL
+from models import Order, OrderItem, Product, User
+
+
+def order_payload(product_id: int) -> schemas.OrderCreate:
+    return schemas.OrderCreate(
+        shipping_address="Bench street 1",
+        payment_method="cash_on_delivery",
+        order_items=[schemas.OrderItemCreate(product_id=product_id, quantity=1)],
+    )
+
+
+def atomic_buy(db, user_id: int, product_id: int) -> bool:
+    try:
+        crud.create_order(db, user_id, order_payload(product_id))
+        return True
+    except ValueError:
+        return False
+
+
+def locking_buy(db, user_id: int, product_id: int) -> bool:
+    """
+    Baseline: the same order written with the product row locked (SELECT ... FOR UPDATE) when it
+    is read, checked and decremented in Python, so the lock is held from the read to the commit.
+    """
+    db_order = Order(user_id=user_id, status="pending", total_amount=0.0, shipping_address="Bench street 1",
+                     payment_method="cash_on_delivery", payment_status="pending", stock_reserved=True)
+    db.add(db_order)
+    db.flush()
+    product = db.query(Product).filter(Product.id == product_id).with_for_update().first()
+    if product.stock_quantity < 1:
+        db.rollback()
+        return False
+    price = float(product.price)
+    db.add(OrderItem(order_id=db_order.id, product_id=product_id, quantity=1, price=price, subtotal=price))
+    product.stock_quantity -= 1
+    db_order.total_amount = price
+    db.commit()
+    db.refresh(db_order)
+    crud._invalidate_products(product_id)
+    db.query(Order).options(
+        joinedload(Order.user), joinedload(Order.order_items).joinedload(OrderItem.product)
+    ).filter(Order.id == db_order.id).first()
+    return True
+
+
+def clear_orders(db, user_id: int) -> None:
+    order_ids = db.query(Order.id).filter(Order.user_id == user_id).scalar_subquery()
+    db.query(OrderItem).filter(OrderItem.order_id.in_(order_ids)).delete(synchronize_session=False)
+    db.query(Order).filter(Order.user_id == user_id).delete(synchronize_session=False)
+
+
+def run(label: str, buy, SessionFactory, user_id: int, product_id: int, args) -> None:
+    with SessionFactory() as db:
+        db.query(Product).filter(Product.id == product_id).update({"stock_quantity": args.stock})
+        clear_orders(db, user_id)
+        db.commit()
+
+    def attempt(_):
+        with SessionFactory() as db:
+            return buy(db, user_id, product_id)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        sold = sum(pool.map(attempt, range(args.buyers)))
+    elapsed = time.perf_counter() - started
+
+    with SessionFactory() as db:
+        left = db.query(Product.stock_quantity).filter(Product.id == product_id).scalar()
+        orders = db.query(Order).filter(Order.user_id == user_id).count()
+    ok = sold == orders == args.stock and left == 0
+    print(f"{label}")
+    print(f"  {args.buyers} buyers in {elapsed:.2f}s = {args.buyers / elapsed:.0f} checkouts/s")
+    print(f"  sold {sold}, orders {orders}, stock left {left} -> {'OK' if ok else 'OVERSOLD/MISMATCH'}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--buyers", type=int, default=1000)
+    parser.add_argument("--stock", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=50, help="concurrent connections")
+    parser.add_argument("--rtt-ms", type=float, default=0.0,
+                        help="simulated network round trip added to every statement (a local database has ~none)")
+    args = parser.parse_args()
+
+    engine = create_engine(DATABASE_URL, pool_size=args.workers, max_overflow=0)
+    if args.rtt_ms:
+        @event.listens_for(engine, "before_cursor_execute")
+        def round_trip(*_):
+            time.sleep(args.rtt_ms / 1000)
+
+        @event.listens_for(engine, "commit")
+        def commit_round_trip(*_):
+            time.sleep(args.rtt_ms / 1000)
+
+    SessionFactory = sessionmaker(bind=engine, autoflush=False)
+    tag = uuid.uuid4().hex[:8]
+    with SessionFactory() as db:
+        user = User(email=f"bench-{tag}@example.com", username=f"bench-{tag}", hashed_password="!")
+        product = Product(name=f"Flash sale {tag}", sku=f"BENCH-{tag}", price=10.0, stock_quantity=args.stock)
+        db.add_all([user, product])
+        db.commit()
+        user_id, product_id = user.id, product.id
+
+    try:
+        run("conditional UPDATE (crud.create_order)", atomic_buy, SessionFactory, user_id, product_id, args)
+        run("SELECT ... FOR UPDATE, check, write", locking_buy, SessionFactory, user_id, product_id, args)
+    finally:
+        with SessionFactory() as db:
+            clear_orders(db, user_id)
+            db.query(Product).filter(Product.id == product_id).delete()
+            db.query(User).filter(User.id == user_id).delete()
+            db.commit()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
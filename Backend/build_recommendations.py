@@ -0,0 +1,30 @@
+import argparse
+import json
+
+from database import SessionLocal
+from recommendations import (
+    RECOMMENDATION_METRICS, RECOMMENDATIONS_METRIC, RECOMMENDATIONS_MIN_SUPPORT, RECOMMENDATIONS_TOP_N,
+    build_recommendations,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fold new orders into the \"frequently bought together\" recommendations.")
+    parser.add_argument("--full", action="store_true", help="Rebuild from the first order instead of the last watermark")
+    parser.add_argument("--metric", choices=RECOMMENDATION_METRICS, default=RECOMMENDATIONS_METRIC)
+    parser.add_argument("--top-n", type=int, default=RECOMMENDATIONS_TOP_N)
+    parser.add_argument("--min-support", type=int, default=RECOMMENDATIONS_MIN_SUPPORT)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        report = build_recommendations(
+            db, full=args.full, metric=args.metric, top_n=args.top_n, min_support=args.min_support
+        )
+    finally:
+        db.close()
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import argparse
+import json
+import sys
+
+from database import SessionLocal
+from product_import import DEFAULT_CHUNK_SIZE, import_products
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import products from CSV or NDJSON, upserting by sku.")
+    parser.add_argument("path", help="File to import, or - for stdin")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Defaults from the file extension (csv otherwise)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    fmt = args.format
+    if fmt is None:
+        fmt = "ndjson" if args.path.lower().endswith((".ndjson", ".jsonl")) else "csv"
+
+    db = SessionLocal()
+    stream = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8-sig", newline="")
+    try:
+        report = import_products(db, stream, fmt, chunk_size=args.chunk_size)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        db.close()
+
+    print(f"Received {report['received']}, inserted {report['inserted']}, "
+          f"updated {report['updated']}, failed {report['failed']}")
+    for error in report["errors"]:
+        print(json.dumps(error), file=sys.stderr)
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
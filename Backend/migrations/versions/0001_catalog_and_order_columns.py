@@ -0,0 +1,88 @@
+"""Columns and indexes added to existing tables since the create_all baseline
+
+create_all creates missing tables but never alters existing ones, so databases created
+before these changes need this revision:
+- products: review aggregates, the full-text search_vector and the catalog indexes
+- reviews: keyset pagination indexes
+- orders: stock_reserved
+
+Every statement is idempotent, so it can also run against a database that create_all
+already built with the current models.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+STAR_COUNTS = [f"rating_{stars}_count" for stars in range(1, 6)]
+
+PRODUCT_INDEXES = {
+    "ix_products_created_at_id": "(created_at, id)",
+    "ix_products_price_id": "(price, id)",
+    "ix_products_search_vector": "USING gin (search_vector)",
+    "ix_products_category_id": "(category_id)",
+    "ix_products_brand": "(brand)",
+    "ix_products_rating_id": "(rating, id)",
+    "ix_products_availability_status": "(availability_status)",
+    # Must match models.PRODUCT_EFFECTIVE_PRICE exactly for the planner to use it
+    "ix_products_effective_price": "((price * (1 - coalesce(discount_percentage, 0) / CAST(100 AS NUMERIC))))",
+}
+
+REVIEW_INDEXES = {
+    "ix_reviews_product_date_id": "(product_id, date, id)",
+    "ix_reviews_product_rating_id": "(product_id, rating, id)",
+}
+
+
+def upgrade():
+    # Review aggregates, backfilled below
+    for column in ["review_count", "rating_total", *STAR_COUNTS]:
+        op.execute(f"ALTER TABLE products ADD COLUMN IF NOT EXISTS {column} INTEGER NOT NULL DEFAULT 0")
+
+    # Full-text search document; array_to_string() is only STABLE, hence the wrapper
+    op.execute(
+        "CREATE OR REPLACE FUNCTION products_tags_to_text(text[]) RETURNS text "
+        "LANGUAGE sql IMMUTABLE AS $$ SELECT coalesce(array_to_string($1, ' '), '') $$"
+    )
+    op.execute(
+        "ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector TSVECTOR GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(brand, '')), 'B') || "
+        "setweight(to_tsvector('english', products_tags_to_text(tags)), 'B') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'C')) STORED"
+    )
+
+    for name, definition in PRODUCT_INDEXES.items():
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON products {definition}")
+    for name, definition in REVIEW_INDEXES.items():
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON reviews {definition}")
+
+    # Stock reservation. Orders placed before it never took stock, so they hold none.
+    op.execute("ALTER TABLE orders ADD COLUMN IF NOT EXISTS stock_reserved BOOLEAN NOT NULL DEFAULT false")
+
+    # Same result as crud.recompute_review_aggregates for products that have reviews;
+    # products without any keep their current rating
+    star_counts = ", ".join(f"count(*) FILTER (WHERE rating = {stars}) AS rating_{stars}_count" for stars in range(1, 6))
+    star_updates = ", ".join(f"{column} = agg.{column}" for column in STAR_COUNTS)
+    op.execute(
+        f"UPDATE products SET review_count = agg.review_count, rating_total = agg.rating_total, "
+        f"rating = round(CAST(agg.rating_total AS NUMERIC) / agg.review_count, 2), {star_updates} "
+        f"FROM (SELECT product_id, count(*) AS review_count, sum(rating) AS rating_total, {star_counts} "
+        f"FROM reviews GROUP BY product_id) AS agg WHERE agg.product_id = products.id"
+    )
+
+
+def downgrade():
+    op.execute("ALTER TABLE orders DROP COLUMN IF EXISTS stock_reserved")
+    for name in [*PRODUCT_INDEXES, *REVIEW_INDEXES]:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    op.execute("ALTER TABLE products DROP COLUMN IF EXISTS search_vector")
+    op.execute("DROP FUNCTION IF EXISTS products_tags_to_text(text[])")
+    for column in ["review_count", "rating_total", *STAR_COUNTS]:
+        op.execute(f"ALTER TABLE products DROP COLUMN IF EXISTS {column}")
@@ -285,13 +285,8 @@ def seed_data():
 
         db.commit()
 
-        # Calculate and update product ratings
-        for product in products:
-            reviews = db.query(Review).filter(Review.product_id == product.id).all()
-            if reviews:
-                avg_rating = sum(review.rating for review in reviews) / len(reviews)
-                product.rating = round(avg_rating, 2)
-        db.commit()
+        # Calculate product ratings, review counts and star histograms
+        crud.recompute_review_aggregates(db)
 
         print(f"Successfully seeded {len(categories)} categories, {len(products)} products, and {len(reviews_data)} reviews")
 
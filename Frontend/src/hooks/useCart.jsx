@@ -4,6 +4,9 @@ import { useAuth } from "./useAuth.jsx";
 
 const CartContext = createContext();
 
+// Cart mutations only return the changed line unless the full cart is asked for
+const FULL_CART = { view: "full" };
+
 export const useCart = () => {
     const context = useContext(CartContext);
     if (!context) {
@@ -46,28 +49,12 @@ export const CartProvider = ({ children }) => {
         return res.data;
     };
 
-    // On login: merge local cart into backend cart once per user, then use backend as source of truth
+    // On login the server has already merged the guest cart (cookie) into the user's cart; load it
     useEffect(() => {
         const syncOnLogin = async () => {
             if (!isAuthenticated || !user?.id) return;
 
-            const syncKey = `cart_synced_user_${user.id}`;
-            const alreadySynced = localStorage.getItem(syncKey) === "true";
-
             try {
-                if (!alreadySynced && cartItems.length > 0) {
-                    // Merge local -> backend by incrementing quantities
-                    await Promise.all(
-                        cartItems.map((item) =>
-                            api.post("/cart/items/", {
-                                product_id: item.id,
-                                quantity: Number(item.quantity || 1),
-                            })
-                        )
-                    );
-                    localStorage.setItem(syncKey, "true");
-                }
-
                 const backendCart = await fetchBackendCart();
                 setCartItems(mapBackendCartToLocal(backendCart));
             } catch (error) {
@@ -95,11 +82,15 @@ export const CartProvider = ({ children }) => {
 
         if (isAuthenticated) {
             try {
-                const res = await api.post("/cart/items/", { product_id: product.id, quantity: 1 });
+                const res = await api.post("/cart/items/", { product_id: product.id, quantity: 1 }, { params: FULL_CART });
                 setCartItems(mapBackendCartToLocal(res.data));
             } catch (error) {
                 console.error("Failed to add to backend cart:", error);
             }
+        } else {
+            // Guest carts are kept server-side (no account needed) so they can be merged at login
+            api.post("/guest-cart/items/", { product_id: product.id, quantity: 1 })
+                .catch((error) => console.error("Failed to add to guest cart:", error));
         }
     };
 
@@ -108,11 +99,14 @@ export const CartProvider = ({ children }) => {
 
         if (isAuthenticated) {
             try {
-                const res = await api.delete(`/cart/items/${productId}`);
+                const res = await api.delete(`/cart/items/${productId}`, { params: FULL_CART });
                 setCartItems(mapBackendCartToLocal(res.data));
             } catch (error) {
                 console.error("Failed to remove from backend cart:", error);
             }
+        } else {
+            api.delete(`/guest-cart/items/${productId}`)
+                .catch((error) => console.error("Failed to remove from guest cart:", error));
         }
     };
 
@@ -132,11 +126,14 @@ export const CartProvider = ({ children }) => {
 
         if (isAuthenticated) {
             try {
-                const res = await api.put(`/cart/items/${productId}`, { quantity: newQuantity });
+                const res = await api.put(`/cart/items/${productId}`, { quantity: newQuantity }, { params: FULL_CART });
                 setCartItems(mapBackendCartToLocal(res.data));
             } catch (error) {
                 console.error("Failed to update backend cart:", error);
             }
+        } else {
+            api.put(`/guest-cart/items/${productId}`, { quantity: newQuantity })
+                .catch((error) => console.error("Failed to update guest cart:", error));
         }
     };
 
@@ -148,15 +145,19 @@ export const CartProvider = ({ children }) => {
         return cartItems.reduce((total, item) => total + (item.quantity || 1), 0);
     };
 
-    const clearCart = async () => {
+    // localOnly: the server already emptied the cart (e.g. POST /checkout)
+    const clearCart = async ({ localOnly = false } = {}) => {
         setCartItems([]);
 
-        if (isAuthenticated) {
+        if (isAuthenticated && !localOnly) {
             try {
                 await api.delete("/cart/");
             } catch (error) {
                 console.error("Failed to clear backend cart:", error);
             }
+        } else if (!isAuthenticated) {
+            api.delete("/guest-cart/")
+                .catch((error) => console.error("Failed to clear guest cart:", error));
         }
     };
 
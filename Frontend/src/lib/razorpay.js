@@ -0,0 +1,93 @@
+import { api } from "./api.js";
+
+export const loadRazorpayScript = () => {
+  return new Promise((resolve) => {
+    if (document.getElementById("razorpay-checkout-js")) return resolve(true);
+    const script = document.createElement("script");
+    script.id = "razorpay-checkout-js";
+    script.src = "https://checkout.razorpay.com/v1/checkout.js";
+    script.onload = () => resolve(true);
+    script.onerror = () => resolve(false);
+    document.body.appendChild(script);
+  });
+};
+
+const reportFailure = async (orderId, razorpayOrderId, errorCode, errorDescription) => {
+  try {
+    await api.post("/payments/razorpay/fail", {
+      order_id: orderId,
+      razorpay_order_id: razorpayOrderId,
+      error_code: errorCode,
+      error_description: errorDescription,
+    });
+  } catch {
+    // ignore
+  }
+};
+
+// Pays an existing order through Razorpay Checkout. Resolves true once the payment is verified,
+// false if the buyer closes the window without paying; throws if the payment can't be started
+// or verified. onFailed is called for failed attempts while the window stays open for a retry.
+export const payWithRazorpay = async (orderId, { onFailed } = {}) => {
+  const ok = await loadRazorpayScript();
+  if (!ok) {
+    throw new Error("Failed to load Razorpay. Please try again.");
+  }
+
+  const rp = await api.post("/payments/razorpay/order", { order_id: orderId });
+
+  return new Promise((resolve, reject) => {
+    let paymentFinalized = false;
+
+    const options = {
+      key: rp.data.key_id,
+      amount: rp.data.amount,
+      currency: rp.data.currency || "INR",
+      name: "SHDPIXEL",
+      description: `Order #${orderId}`,
+      order_id: rp.data.razorpay_order_id,
+      handler: async (response) => {
+        paymentFinalized = true;
+        try {
+          await api.post("/payments/razorpay/verify", {
+            order_id: orderId,
+            razorpay_order_id: response.razorpay_order_id,
+            razorpay_payment_id: response.razorpay_payment_id,
+            razorpay_signature: response.razorpay_signature,
+          });
+          resolve(true);
+        } catch (err) {
+          console.error("Payment verification failed:", err);
+          await reportFailure(
+            orderId,
+            rp.data.razorpay_order_id,
+            "verification_failed",
+            err.response?.data?.detail || "Payment verification failed"
+          );
+          reject(err);
+        }
+      },
+      modal: {
+        ondismiss: async () => {
+          if (paymentFinalized) return;
+          await reportFailure(orderId, rp.data.razorpay_order_id, "cancelled", "User cancelled the Razorpay checkout");
+          resolve(false);
+        },
+      },
+    };
+
+    const RazorpayCheckout = window.Razorpay;
+    const razorpay = new RazorpayCheckout(options);
+    razorpay.on("payment.failed", async (resp) => {
+      if (paymentFinalized) return;
+      await reportFailure(
+        orderId,
+        rp.data.razorpay_order_id,
+        resp?.error?.code,
+        resp?.error?.description || resp?.error?.reason || "Payment failed"
+      );
+      onFailed?.(resp?.error?.description || "Payment failed. Please try again.");
+    });
+    razorpay.open();
+  });
+};
@@ -3,18 +3,7 @@ import { Link, useLocation } from "wouter";
 import { useCart } from "../hooks/useCart";
 import { api } from "../lib/api.js";
 import { formatINR } from "../lib/currency.js";
-
-const loadRazorpayScript = () => {
-  return new Promise((resolve) => {
-    if (document.getElementById("razorpay-checkout-js")) return resolve(true);
-    const script = document.createElement("script");
-    script.id = "razorpay-checkout-js";
-    script.src = "https://checkout.razorpay.com/v1/checkout.js";
-    script.onload = () => resolve(true);
-    script.onerror = () => resolve(false);
-    document.body.appendChild(script);
-  });
-};
+import { payWithRazorpay } from "../lib/razorpay.js";
 
 const Checkout = () => {
   const { cartItems, getCartTotal, clearCart } = useCart();
@@ -24,6 +13,7 @@ const Checkout = () => {
   const [paymentMethod, setPaymentMethod] = useState("cash_on_delivery");
   const [submitting, setSubmitting] = useState(false);
   const [error, setError] = useState("");
+  const [placedOrderId, setPlacedOrderId] = useState(null);
 
   const itemCount = useMemo(
     () => cartItems.reduce((sum, item) => sum + (item.quantity || 1), 0),
@@ -45,103 +35,26 @@ const Checkout = () => {
       return;
     }
 
-    const orderPayload = {
-      shipping_address: shippingAddress.trim(),
-      payment_method: paymentMethod,
-      order_items: cartItems.map((item) => ({
-        product_id: item.id,
-        quantity: Number(item.quantity || 1),
-      })),
-    };
-
     try {
       setSubmitting(true);
-      const res = await api.post("/orders/", orderPayload);
+      // The server turns the cart into the order and empties it in one transaction
+      const res = await api.post("/checkout", {
+        shipping_address: shippingAddress.trim(),
+        payment_method: paymentMethod,
+      });
       const createdOrder = res.data;
+      // The server cart is already empty, so the local one goes too; a payment that fails
+      // or is cancelled is retried from the order page, not by placing the order again
+      clearCart({ localOnly: true });
+      setPlacedOrderId(createdOrder.id);
 
       if (paymentMethod === "razorpay") {
-        const ok = await loadRazorpayScript();
-        if (!ok) {
-          setError("Failed to load Razorpay. Please try again.");
-          return;
+        try {
+          await payWithRazorpay(createdOrder.id);
+        } catch (err) {
+          console.error("Razorpay payment failed:", err);
         }
-
-        const rp = await api.post("/payments/razorpay/order", { order_id: createdOrder.id });
-        let paymentFinalized = false;
-
-        const options = {
-          key: rp.data.key_id,
-          amount: rp.data.amount,
-          currency: rp.data.currency || "INR",
-          name: "SHDPIXEL",
-          description: `Order #${createdOrder.id}`,
-          order_id: rp.data.razorpay_order_id,
-          handler: async (response) => {
-            try {
-              paymentFinalized = true;
-              await api.post("/payments/razorpay/verify", {
-                order_id: createdOrder.id,
-                razorpay_order_id: response.razorpay_order_id,
-                razorpay_payment_id: response.razorpay_payment_id,
-                razorpay_signature: response.razorpay_signature,
-              });
-              await clearCart();
-              navigate(`/orders/${createdOrder.id}`);
-            } catch (err) {
-              console.error("Payment verification failed:", err);
-              try {
-                await api.post("/payments/razorpay/fail", {
-                  order_id: createdOrder.id,
-                  razorpay_order_id: rp.data.razorpay_order_id,
-                  error_code: "verification_failed",
-                  error_description: err.response?.data?.detail || "Payment verification failed",
-                });
-              } catch {
-                // ignore
-              }
-              setError(err.response?.data?.detail || "Payment verification failed.");
-            }
-          },
-          modal: {
-            ondismiss: async () => {
-              if (!paymentFinalized) {
-                try {
-                  await api.post("/payments/razorpay/fail", {
-                    order_id: createdOrder.id,
-                    razorpay_order_id: rp.data.razorpay_order_id,
-                    error_code: "cancelled",
-                    error_description: "User cancelled the Razorpay checkout",
-                  });
-                } catch {
-                  // ignore
-                }
-              }
-              setError("Payment cancelled. You can retry from the order details page.");
-            },
-          },
-        };
-
-        const RazorpayCheckout = window.Razorpay;
-        const razorpay = new RazorpayCheckout(options);
-        razorpay.on("payment.failed", async (resp) => {
-          if (paymentFinalized) return;
-          try {
-            await api.post("/payments/razorpay/fail", {
-              order_id: createdOrder.id,
-              razorpay_order_id: rp.data.razorpay_order_id,
-              error_code: resp?.error?.code,
-              error_description: resp?.error?.description || resp?.error?.reason || "Payment failed",
-            });
-          } catch {
-            // ignore
-          }
-          setError(resp?.error?.description || "Payment failed. Please try again.");
-        });
-        razorpay.open();
-        return;
       }
-
-      await clearCart();
       navigate(`/orders/${createdOrder.id}`);
     } catch (err) {
       console.error("Order creation failed:", err);
@@ -151,6 +64,15 @@ const Checkout = () => {
     }
   };
 
+  if (placedOrderId) {
+    return (
+      <div className="container mx-auto px-4 py-8">
+        <h1 className="text-3xl font-bold mb-6">Checkout</h1>
+        <p className="text-gray-600">Order #{placedOrderId} placed. Completing payment...</p>
+      </div>
+    );
+  }
+
   if (cartItems.length === 0) {
     return (
       <div className="container mx-auto px-4 py-8">
@@ -2,6 +2,7 @@ import { useEffect, useState } from "react";
 import { Link, useParams } from "wouter";
 import { api } from "../lib/api.js";
 import { formatINR } from "../lib/currency.js";
+import { payWithRazorpay } from "../lib/razorpay.js";
 
 const badgeColor = (status) => {
   switch (status) {
@@ -25,25 +26,49 @@ const OrderDetails = () => {
   const [order, setOrder] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
+  const [paying, setPaying] = useState(false);
+  const [paymentError, setPaymentError] = useState("");
 
-  useEffect(() => {
-    const fetchOrder = async () => {
-      try {
-        setLoading(true);
-        setError("");
-        const res = await api.get(`/orders/${params.id}`);
-        setOrder(res.data);
-      } catch (err) {
-        console.error("Error fetching order:", err);
-        setError(err.response?.data?.detail || "Failed to load order");
-      } finally {
-        setLoading(false);
-      }
-    };
+  const fetchOrder = async () => {
+    try {
+      setLoading(true);
+      setError("");
+      const res = await api.get(`/orders/${params.id}`);
+      setOrder(res.data);
+    } catch (err) {
+      console.error("Error fetching order:", err);
+      setError(err.response?.data?.detail || "Failed to load order");
+    } finally {
+      setLoading(false);
+    }
+  };
 
+  useEffect(() => {
     if (params?.id) fetchOrder();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [params?.id]);
 
+  // Unpaid Razorpay orders (failed or cancelled at checkout) are paid again from here
+  const canPay =
+    order?.payment_method === "razorpay" &&
+    ["pending", "failed"].includes(order?.payment_status) &&
+    order?.status !== "cancelled";
+
+  const handlePay = async () => {
+    setPaymentError("");
+    setPaying(true);
+    try {
+      const paid = await payWithRazorpay(order.id, { onFailed: setPaymentError });
+      if (!paid) setPaymentError("Payment cancelled.");
+    } catch (err) {
+      console.error("Payment failed:", err);
+      setPaymentError(err.response?.data?.detail || err.message || "Payment failed. Please try again.");
+    } finally {
+      setPaying(false);
+      fetchOrder();
+    }
+  };
+
   if (loading) {
     return (
       <div className="container mx-auto px-4 py-8">
@@ -166,6 +191,19 @@ const OrderDetails = () => {
               <span>Total</span>
               <span>{formatINR(order.total_amount || 0)}</span>
             </div>
+            {paymentError && (
+              <p className="text-sm text-red-600 mt-4">{paymentError}</p>
+            )}
+            {canPay && (
+              <button
+                type="button"
+                onClick={handlePay}
+                disabled={paying}
+                className="w-full mt-4 bg-blue-600 text-white py-3 rounded-lg hover:bg-blue-700 transition disabled:opacity-50"
+              >
+                {paying ? "Processing..." : "Pay now"}
+              </button>
+            )}
           </div>
         </div>
       </div>
@@ -3,6 +3,9 @@ import { Link } from "wouter";
 import { api } from "../lib/api.js";
 import { formatINR } from "../lib/currency.js";
 
+// Only the columns the grid renders; served from the slim summary projection
+const GRID_FIELDS = "name,price,thumbnail,category_name,description,brand";
+
 const Products = () => {
     const [products, setProducts] = useState([]);
     const [loading, setLoading] = useState(false);
@@ -13,10 +16,11 @@ const Products = () => {
     const fetchProducts = async (skipValue = 0, append = false) => {
         try {
             setLoading(true);
-            const res = await api.get('/products/', {
+            const res = await api.get('/products/summary', {
                 params: {
                     limit,
-                    skip: skipValue
+                    skip: skipValue,
+                    fields: GRID_FIELDS
                 }
             });
 
@@ -66,7 +70,7 @@ const Products = () => {
                         <div className="glass-card overflow-hidden h-full flex flex-col hover:translate-y-[-8px] transition-all duration-500">
                             <div className="relative aspect-square overflow-hidden">
                                 <img
-                                    src={product.thumbnail || product.images?.[0] || "https://images.unsplash.com/photo-1505740420928-5e560c06d30e?w=500"}
+                                    src={product.thumbnail || "https://images.unsplash.com/photo-1505740420928-5e560c06d30e?w=500"}
                                     alt={product.name}
                                     className="w-full h-full object-cover transition-transform duration-700 group-hover:scale-110"
                                 />
@@ -75,7 +79,7 @@ const Products = () => {
                                 </div>
                                 <div className="absolute top-4 left-4">
                                     <span className="bg-blue-600/80 backdrop-blur-md text-white text-[10px] uppercase tracking-widest px-3 py-1 rounded-full font-bold">
-                                        {product.category_rel?.name || 'Exclusive'}
+                                        {product.category_name || 'Exclusive'}
                                     </span>
                                 </div>
                             </div>